@@ -0,0 +1,3178 @@
+# pipourri.py, everything behind pi-pourri.py
+# By Andrew Richter
+# March 2022
+#
+#   I started with picrunch.py by Don Cross
+# See his wonderful article at:
+# https://medium.com/@cosinekitty/how-to-calculate-a-million-digits-of-pi-d62ce3db8f58
+# and See: http://www.craig-wood.com/nick/articles/pi-chudnovsky/ 
+#   I had a kid ask me "How long would it take to calcuate a Million digits of Pi?"
+#   This code can Use Machin's Formula or one of the Machin Like formulae with gmpy2 mpz() for the numbers
+#    Machin 1706
+#  π/4 = 4*(4*arctan(1/5) - arctan(1/239)) or
+#    Hwang Chien-Lih, 2003
+#  π/4 = 183*arctan(1/239) + 32*arctan(1/1023)-68*arctan(5832)+
+#         12*arctan(1/110443)-12*arctan(4841182)-100*arctan(6826318)
+#    Hwang Chien-Lih, 2003
+#  π/4 =  183*arctan(1/239) + 32*arctan(1/1023)-68*arctan(1/5832)+
+#         12*arctan(1/113021)-100*arctan(1/6826318)-12*arctan(1/33366019650)+
+#         12*arctan(1/43599522992503626068)
+#  or Chudnovosky 1988: π = (Q(0, N) / 12T(0, N) + 12AQ(0, N))**(C**(3/2)
+#
+#   Try --help to see the list of available formulae. All have been checked using -d 1,000,000 against https://www.piday.org/million/
+#   I also used the last five digits of known results to check the answers for lengths that are powers of ten (100,....1,000,000,000)
+#   If you want to add a Machin-like_formula, just add a Formula() to FORMULAE with its multipliers, denominators and signs.
+#     Each of those lists Must contain the same number of entries
+#   pi-pourri.py is only the command line, this module is imported so Python keeps its bytecode cached
+#   It can also be used as a library: import pipourri; pipourri.compute_pi(1000000, "chudnovsky")
+#     A long running process reuses the Pools between calls
+#   Chudnovsky can also split its binary splitting tree across -w xx worker processes and merge the pieces as a tree
+#     the square root runs in a process of its own at the same time, and the division waits for the series, not the root
+#   Long Chudnovsky and AGM runs can --checkpoint their progress to disk and --resume after being killed
+#   The memory each formula needs is estimated up front, past --max-memory (or the machine's RAM) it uses fewer
+#     workers, then --out-of-core Chudnovsky that keeps its subtrees on disk, and refuses to start if nothing fits
+#   --cache-dir keeps the longest answer so far on disk, any request it covers is just a slice of the mmap'd file
+#   --verify checks hex digits at random positions with BBP digit extraction while the calculation runs
+#     and --verify-algo xx runs a second formula and compares every digit
+#   --hex-offset xx --hex-count yy prints hex digits of π from any offset using BBP digit extraction, the terms
+#     are shared out over a Pool so "digits 10,000,000 to 10,000,100" doesn't need the 10 million before them
+#   --serve [port] or --serve-socket path runs a server, GET /pi?digits=N&algo=chudnovsky streams the digits back.
+#     Requests for the same or fewer digits share one calculation and it is cancelled if they all hang up
+#   --format bcd, u64 or ycd writes the digits packed two to a byte or 19 to 8 bytes, and DigitFile("pi.ycd").digits(start, stop)
+#     reads any range back through mmap without decoding the rest of the file
+#   --batch 10 100 1,000,000 known (or a --batch-file manifest) computes once to the biggest count, then cuts every
+#     smaller answer out of it, checks its last 5 digits and writes the files in a Pool, pi-1000.txt and so on
+#   --index builds a k-gram index of the -f file, then --search 999999 -f pi.txt says where a run of digits first turns
+#     up and how often in milliseconds, reading the index and the digits through mmap
+#   --benchmark times every formula (or --bench-algos) from 1,000 digits up to --bench-max and writes a CSV or JSON table
+#   Big Pool results come back through multiprocessing.shared_memory (SharedValue) instead of being pickled through a pipe
+#   For Machin-like formulae the arctan(1/nnnnn) calulations run in a multiprocessing.Pool() with one process per core (or -w)
+#   When all the threads are done the rest of the formula is processed
+#   By default the arctans are exact integer binary splitting (--arctan bs), so big denominators really are cheaper.
+#     Each series is cut into pieces sized by its cost so the small denominators don't hold everyone up.
+#     --arctan atan2 uses gmpy2's atan2() as before
+#   -a auto picks the formula and -w for -d from the cost and memory estimates, scaled by a multiply and a square
+#     root timed once on this machine and cached in ~/.cache/pi-pourri/host.json (--recalibrate times them again)
+#   It calculates pi to -d xxxx places after the decimal The Default is 100,000
+#   and writes the answer to a -f filename The default is pi.txt in the current directory
+#
+#   All of the formulae can get to a million digits in a few seconds  Real differences start to show up around 10 million.
+#   It takes about two and a half minutes for Chudnovsky(8) to get to 100 Million digits
+#   The parser will allow -d as high as a Billion. Chudnovsky and AGM fail at afer a Billion or so because the calulation 
+#   is too large for my laptop. GMPY2 will go to trillions with enough memory space. 
+#   100 million digits takes anywhere from 3 to 45 minutes depending on which formula is used
+#   I used crude timeing using time() - start_time to generate elapsed seconds  There are better ways
+#     so --metrics xx.json has perf_counter() times for each phase (setup, series, sqrt, division, convert, write),
+#     peak RSS and the progress samples.  --profile xx.prof and --trace-malloc profile the calculation
+#
+from datetime import timedelta
+from functools import partial
+from contextlib import contextmanager
+import sys,time,multiprocessing,logging,os,argparse,struct,resource,json,mmap,math,random,atexit,fcntl
+import importlib.util
+from multiprocessing import resource_tracker
+try:
+    from gmpy2 import mpz,isqrt,mpfr,atan2,sqrt,get_context,const_pi,to_binary,from_binary,floor,powmod,get_exp  # Gumpy2 mpz large ints are ten times faster than python large int
+except ImportError:
+    raise ImportError('This program requires gmpy2, please insatll. exiting....')
+# Everything else heavy is imported where it is used, so a short run only pays for what it needs
+
+# CONSTANTS
+LOG_LEVELS = ["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"]
+DEFAULT_LOG_LEVEL = "INFO"
+LOG2_10 = 3.321928094887362
+CHECKPOINT_MAGIC = b"PIPOURRI"
+CHECKPOINT_BLOCKS = 64  # Chudnovsky splits the series into at least this many pieces when checkpointing
+MAX_DIGITS = 1000000000  # -d, --batch, compute_pi() and the server, held in memory
+MAX_DIGITS_OUT_OF_CORE = 100000000000  # the same with --out-of-core, only the answer itself has to fit
+DIGIT_CHUNK = 1000000  # Digits converted and written at a time when streaming the answer
+DIGITS_AT_ONCE = DIGIT_CHUNK  # RadixConverter lets digits() do pieces up to this size whole, bigger ones are split so they stream
+DIGIT_FORMATS = ("text", "bcd", "u64", "ycd")  # --format, all but text are written by write_pi_packed()
+DIGIT_MAGIC = b"PIDIGITS"
+DIGIT_HEADER = "<8s4s4xQQ"  # magic, format, digits after the point, block size
+U64_DIGITS = 19  # decimal digits in each uint64 of the u64 and ycd formats
+YCD_BLOCK = 1000000  # digits in each indexed block of a ycd file
+INDEX_MAGIC = b"PIINDEX1"
+INDEX_HEADER = "<8sIIQQQ"  # magic, gram length, 0, digits indexed, chunk, size of the digit file
+INDEX_GRAM = 5  # digits in each indexed k-gram, a chunk's table has 10**INDEX_GRAM + 1 entries
+INDEX_CHUNK = 1 << 20  # k-gram positions sorted together, the most a Pool worker holds at once
+BATCH_NAME = "pi-{digits}"  # --batch file names without -f, the extension comes from --format
+SHARED_MIN_BYTES = 1 << 20  # Pool results bigger than this come back through shared memory instead of the pipe
+HEX_PER_DIGIT = 0.8304820237218405  # log16(10), hex digits of π we know per decimal digit
+BBP_SERIES = ((1, 4), (4, -2), (5, -1), (6, -1))  # (j, weight) π = sum(16**-k * weight / (8k + j))
+BBP_COST_FACTOR = 4e-6  # seconds per hex position for bbp_hex_digits() on one core
+BBP_SPLIT_MIN = 100000  # bbp_hex_digits() positions worth sharing out over a Pool
+VERIFY_FRACTION = 0.05  # share of the estimated calculation time the --verify spot checks get without idle cores
+VERIFY_MIN_POSITION = 2000  # spot checks can always reach this far, it's a few milliseconds
+VERIFY_HEX_DIGITS = 8  # hex digits compared at each spot
+HOST_CALIBRATION_DIGITS = 1000000  # calibrate_host() times a multiply and a square root of numbers this size
+HOST_REFERENCE = {"mul": 0.016, "sqrt": 0.038}  # calibrate_host() on the machine the COST_FACTORs were measured on
+WORKER_START_COST = 0.005  # seconds to start each Pool process, so --algo auto doesn't use workers for small runs
+LAST_5_DIGITS_OF_PI = {
+             10 : "26535",
+            100 : "70679",
+           1000 : "01989",
+          10000 : "75678",
+         100000 : "24646",
+        1000000 : "58151",
+        1234567 : "14707",
+       10000000 : "55897",
+      100000000 : "51592",
+     1000000000 : "45519",
+    }
+# utility functions
+def say_formula(credit,mults,denoms,signs):
+    """ say formula creates a printed version of a formula using parts of the formula
+        :param string credit: nmae and date of formula author
+        :param list mults: array of Manchin multiples
+        :param list denoms: array of arctan denominators
+        :param list signs: array of plus or minus for formula arctans
+        :return string: printed version of the formula
+        """
+    # format a Manchin like formula string from 3 lists and an author's credit or just print others
+    if  '\t' in credit:
+        form = credit
+    else:
+        form = "\t{}\n\t".format(credit) + "π/4 = "
+        for i in range(0,len(denoms)):
+            if i == 0:
+                sign = '' # No leading sign of first arctan multiple
+            else:
+                sign = '\t\t' + (('-','+')[signs[i]>0])  +  ' '
+            if mults[i] == 1: # Don't say 1*arctan() just say arctan()
+                mx = ""
+            else:
+                mx = str(mults[i]) + "*"
+            form = form + ' ' + sign + mx + 'arctan(1/' +str(denoms[i]) + ')\n'
+    return form
+
+def range_type(test_value, rngMin=1, rngMax=10):
+    """ range_type is a simple range check for low high boundry
+        :param string value: string to convert to a positive int (drop commas and other chars)
+        :param int rngMin:  integer minimum allowed value
+        :param int rngMax:  interger max allowed value
+        :return int accepted value
+        :throws argparse.ArgumentTypeError
+        """
+    value = int(''.join(filter(lambda i: i.isdigit(), test_value)) )  # chuck everthing but digits.  result is a positive int
+    if value not in range(rngMin,rngMax+1):
+        raise argparse.ArgumentTypeError('value {} not in range {:,} to {:,}'
+            .format(value,rngMin,rngMax))
+    return value
+
+def algo_type(value):
+    """ algo_type is range_type() for --algo, which also takes auto
+        :param string value: 1 to NUM_OF_FORMULAE or auto
+        :return int or "auto"
+        """
+    if value.strip().lower() == "auto":
+        return "auto"
+    return range_type(value, rngMin=1, rngMax=NUM_OF_FORMULAE)
+
+POOLS = {}  # (pid, name) -> (processes, multiprocessing.Pool) kept until close_pools()
+
+def get_pool(processes,name="work"):
+    """ get_pool hands out the Pool for a name, creating it the first time
+        Pools are kept so a long running process doesn't pay to start them on every call.  There is one per name,
+        asking for a different size closes the old one (after its work is done) and starts one of the new size.
+        :param int processes: number of worker processes
+        :param string name: separate Pools for jobs that run at the same time, so one can't queue behind the other
+        :return multiprocessing.Pool
+        """
+    key = (os.getpid(), name)  # A forked child can't use its parent's Pools
+    if key in POOLS and POOLS[key][0] != processes:
+        __, pool = POOLS.pop(key)
+        pool.close()
+        pool.join()
+    if key not in POOLS:
+        resource_tracker.ensure_running()  # so the workers share our tracker for the SharedValue segments they create
+        POOLS[key] = (processes, multiprocessing.Pool(processes=processes))
+    return POOLS[key][1]
+
+def close_pools(wait=True):
+    """ close_pools shuts down this process's Pools, the next get_pool() starts afresh
+        Only children that have exited count in RUSAGE_CHILDREN, so run it before reading their CPU time and peak RSS.
+        :param bool wait: let queued work finish, False terminates the workers like at exit (or after a ^C)
+        """
+    for key in [key for key in POOLS if key[0] == os.getpid()]:
+        __, pool = POOLS.pop(key)
+        if wait:
+            pool.close()
+        else:
+            pool.terminate()
+        pool.join()
+
+atexit.register(close_pools, wait=False)
+
+class PiMetrics:
+    """ Run telemetry, the machine readable side of the debug log
+        phase() times a block with perf_counter, a phase inside another is named "compute/series" and so on.
+        progress() is where the engines report their iterations, it logs them at debug and keeps a sample.
+        Every phase and sample reads peak RSS.  as_dict() is what --metrics writes as JSON.
+        Pool workers have their own copy, their progress is logged but the samples stay in the worker.
+    """
+    MAX_SAMPLES = 1000  # progress samples kept, every other one is dropped past this
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """ Start over, the clock too """
+        self.start = time.perf_counter()
+        self.phases = {}  # "compute/series" -> seconds, in the order they started
+        self.stack = []  # names of the phases we are in
+        self.samples = []
+        self.info = {}  # anything else for the JSON, formula, digits ...
+        self.peak_rss_kb = 0
+        self.allocations = None  # tracemalloc results from profile()
+
+    def rss_kb(self):
+        """ Peak RSS of this process or its biggest finished child in KB, ru_maxrss is KB on Linux """
+        usage = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+        self.peak_rss_kb = max(self.peak_rss_kb, usage)
+        return usage
+
+    @contextmanager
+    def phase(self,name):
+        """ Time the with block as name, added to any earlier time under the same name """
+        self.stack.append(name)
+        key = "/".join(self.stack)
+        self.phases.setdefault(key, 0.0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[key] += time.perf_counter() - start
+            self.stack.pop()
+            self.rss_kb()
+
+    def add(self,name,seconds):
+        """ Count seconds timed somewhere else as a phase inside the current one """
+        key = "/".join(self.stack + [name])
+        self.phases[key] = self.phases.get(key, 0.0) + seconds
+
+    def progress(self,engine,iterations,detail=None):
+        """ An engine's progress, logged at debug and kept as a sample
+        :param string engine: who is reporting, starts the log line
+        :param int iterations: iterations so far
+        :param string detail: more for the log line, like how many subtrees are left
+        """
+        elapsed = time.perf_counter() - self.start
+        self.samples.append({"seconds": round(elapsed, 4), "engine": engine, "iterations": int(iterations),
+            "rss_kb": self.rss_kb()})
+        if len(self.samples) > self.MAX_SAMPLES:
+            self.samples = self.samples[::2]
+        logging.debug('{} ... {:,} iterations{} and {:.2f} seconds.'
+            .format(engine, int(iterations), ", " + detail if detail else "", elapsed), stacklevel=2)
+
+    @contextmanager
+    def profile(self,profile_file=None,trace_malloc=False):
+        """ Profile the with block, cProfile and tracemalloc are only imported when they are asked for
+        :param string profile_file: write cProfile stats here, python -m pstats or snakeviz read them. None for no cProfile
+        :param bool trace_malloc: trace Python allocations, the peak and the top sites go in as_dict().
+            gmpy2 numbers come from GMP's allocator so peak RSS is the one to watch for those
+        """
+        profiler = tracemalloc = None
+        if profile_file:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+        if trace_malloc:
+            import tracemalloc
+            tracemalloc.start()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+                profiler.dump_stats(profile_file)
+                logging.info("Wrote cProfile stats to {}".format(profile_file))
+            if tracemalloc:
+                snapshot = tracemalloc.take_snapshot().filter_traces([  # not the profilers' own
+                    tracemalloc.Filter(False, "*cProfile.py"), tracemalloc.Filter(False, tracemalloc.__file__)])
+                __, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                self.allocations = {"peak_kb": peak // 1024, "top": [
+                    {"site": str(stat.traceback), "kb": stat.size // 1024, "count": stat.count}
+                    for stat in snapshot.statistics('lineno')[:10]]}
+
+    def as_dict(self):
+        self.rss_kb()
+        metrics = dict(self.info)
+        metrics.update({"total_seconds": round(time.perf_counter() - self.start, 4),
+            "phases": {key: round(seconds, 4) for key, seconds in self.phases.items()},
+            "peak_rss_kb": self.peak_rss_kb,
+            "progress": self.samples})
+        if self.allocations:
+            metrics["allocations"] = self.allocations
+        return metrics
+
+    def write(self,out_name):
+        """ Write as_dict() as JSON, - for stdout """
+        if out_name == "-":
+            json.dump(self.as_dict(), sys.stdout, indent=1, ensure_ascii=False)
+            sys.stdout.write("\n")
+            return
+        with open(out_name, mode='wt', encoding="utf-8") as outfile:
+            json.dump(self.as_dict(), outfile, indent=1, ensure_ascii=False)
+        logging.info("Wrote run metrics to {}".format(out_name))
+
+METRICS = PiMetrics()  # this process's telemetry, the engines report to it
+
+class SharedValue:
+    """ An mpz or mpfr parked in multiprocessing.shared_memory by the process that computed it
+        Only the segment name goes through the Pool's pipe instead of the pickled number.  The receiver
+        rebuilds the value straight out of the segment and unlinks it, so each one can be read just once.
+    """
+    def __init__(self,blob):
+        """ Initialization
+        :param bytes blob: gmpy2 to_binary() of the value
+        """
+        from multiprocessing import shared_memory
+        segment = shared_memory.SharedMemory(create=True, size=len(blob))
+        segment.buf[:len(blob)] = blob
+        self.name = segment.name
+        self.size = len(blob)
+        segment.close()
+
+    def get(self):
+        """ The value back, the segment is gone afterwards """
+        from multiprocessing import shared_memory
+        segment = shared_memory.SharedMemory(name=self.name)
+        try:
+            return from_binary(bytes(segment.buf[:self.size]))
+        finally:
+            segment.close()
+            segment.unlink()
+
+def share(values):
+    """ share swaps the big mpz/mpfr values in a list for SharedValue handles, small values are left to pickle
+        :param list values: a Pool worker's result
+        :return list to hand back to the Pool
+        """
+    shared = []
+    for value in values:
+        if isinstance(value, mpz) and value.bit_length() >= 8 * SHARED_MIN_BYTES:
+            value = SharedValue(to_binary(value))
+        elif isinstance(value, mpfr) and value.precision >= 8 * SHARED_MIN_BYTES:
+            value = SharedValue(to_binary(value))
+        shared.append(value)
+    return shared
+
+def unshare(values):
+    """ unshare is the other end of share(), values that weren't shared pass straight through """
+    return [value.get() if isinstance(value, SharedValue) else value for value in values]
+
+def merge_pqt(pair,need_p=True):
+    """ merge_pqt combines two adjacent binary splitting results into one
+        :param tuple pair: ([p_am, q_am, t_am], [p_mb, q_mb, t_mb]) for ranges [a, m) and [m, b)
+        :param bool need_p: False for the top of the tree, p_ab is the biggest product and nothing uses it
+        :return list [p_ab, q_ab, t_ab] for the range [a, b), p_ab is None without need_p
+        """
+    (p_am, q_am, t_am), (p_mb, q_mb, t_mb) = pair
+    return [p_am * p_mb if need_p else None, q_am * q_mb, q_mb * t_am + p_am * t_mb]
+
+def mpfr_to_int(pi,ndigits):
+    """ mpfr_to_int chops an mpfr down to ndigits after the decimal, like format() with D did
+        :param mpfr pi: value with a few guard digits of precision
+        :param int ndigits: digits after the decimal to keep
+        :return mpz: floor(pi * 10**ndigits)
+        """
+    context = get_context()
+    precision = context.precision
+    context.precision = max(precision, pi.precision)  # const_pi() hands back more precision than the context has
+    try:
+        return mpz(floor(pi * pow(mpz(10), ndigits)))
+    finally:
+        context.precision = precision
+
+class RadixConverter:
+    """ Converts pi * 10**ndigits to decimal digits a chunk at a time, most significant first
+        It is divide and conquer: split the number by a power of ten into high and low halves until each piece
+        is no more than at_once digits, which GMP's own digits() converts whole.  The whole string never exists at
+        once and the first chunk is out long before the last piece is converted.
+        The low half is always a power of two count of chunks, so every split uses one of a few powers of ten that
+        are squared up once and cached.  With workers the top of the tree is split here and the pieces are
+        converted in a Pool, they go there through shared memory.
+    """
+    def __init__(self,chunk=DIGIT_CHUNK,workers=None,at_once=DIGITS_AT_ONCE):
+        """ Initialization
+        :param int chunk: most digits handed out at a time
+        :param int workers: processes converting pieces in parallel, None or 1 converts here
+        :param int at_once: largest piece converted whole with digits()
+        """
+        self.chunk = chunk
+        self.workers = workers or 1
+        self.at_once = max(at_once, chunk)
+        self.powers = {}  # blocks -> 10**(blocks * chunk)
+
+    def __getstate__(self):
+        """ Pool workers build their own (smaller) powers, don't pickle ours """
+        state = self.__dict__.copy()
+        state['powers'] = {}
+        return state
+
+    def power(self,blocks):
+        """ 10**(blocks * chunk) for a power of two count of blocks, squared up from the smaller cached power """
+        if blocks not in self.powers:
+            self.powers[blocks] = pow(mpz(10), self.chunk) if blocks == 1 else self.power(blocks // 2) ** 2
+        return self.powers[blocks]
+
+    def split(self,value,ndigits):
+        """ split a number into its high and low digits
+        :param mpz value: number with ndigits digits (zero padded)
+        :param int ndigits: more than one chunk
+        :return list [(mpz high, int digits), (mpz low, int digits)]
+        """
+        blocks = (ndigits + self.chunk - 1) // self.chunk
+        low_blocks = 1 << ((blocks - 1).bit_length() - 1)  # largest power of two below blocks
+        high, low = divmod(value, self.power(low_blocks))
+        return [(high, ndigits - low_blocks * self.chunk), (low, low_blocks * self.chunk)]
+
+    def chunks(self,value,ndigits):
+        """ Serial conversion
+        :param mpz value: non negative integer to convert
+        :param int ndigits: number of digits value is zero padded to
+        :return generator of strings, at most chunk digits each
+        """
+        if ndigits <= self.at_once:
+            text = value.digits().zfill(ndigits)
+            del value
+            for start in range(0, ndigits, self.chunk):
+                yield text[start:start + self.chunk]
+            return
+        (high, high_len), (low, low_len) = self.split(value, ndigits)
+        del value  # Let go of our copy, the caller's is all that is left
+        yield from self.chunks(high, high_len)
+        del high
+        yield from self.chunks(low, low_len)
+
+    def convert_piece(self,piece):
+        """ Pool entry point, convert one (value, ndigits) piece to a string, the value may be shared """
+        value, ndigits = piece
+        return ''.join(self.chunks(unshare([value])[0], ndigits))
+
+    def convert(self,value,ndigits):
+        """ Convert in parallel if we have workers and enough digits to share
+        :param mpz value: non negative integer to convert
+        :param int ndigits: number of digits value is zero padded to
+        :return generator of strings in order
+        """
+        if self.workers < 2 or ndigits <= 2 * self.chunk:
+            yield from self.chunks(value, ndigits)
+            return
+        pieces = [(value, ndigits)]
+        del value
+        while len(pieces) < self.workers * 4:  # A few pieces per worker keeps them all busy to the end
+            split = []
+            for piece in pieces:
+                split.extend(self.split(*piece) if piece[1] > self.chunk else [piece])
+            if len(split) == len(pieces):
+                break
+            pieces = split
+        logging.debug("Converting {} pieces to decimal with {} Pool processes".format(len(pieces), self.workers))
+        pieces.reverse()
+        shared = []
+        while pieces:  # Shared one at a time so each mpz goes as soon as its copy is in shared memory
+            value, piece_digits = pieces.pop()
+            shared.append((share([value])[0], piece_digits))
+        del value
+        yield from get_pool(self.workers).imap(self.convert_piece, shared)
+
+def write_pi(outfile,pi,ndigits,converter=None):
+    """ write_pi streams 3.1415... to an open text file as the digits are converted
+        :param file outfile: where to write
+        :param mpz pi: pi * 10**ndigits
+        :param int ndigits: digits after the decimal
+        :param RadixConverter converter: does the conversion, None for a serial one
+        :return tuple (seconds converting, seconds writing)
+        """
+    converter = converter or RadixConverter()
+    time_to_convert = time_to_write = 0
+    first = True
+    digit_stream = converter.convert(pi, ndigits + 1)
+    while True:
+        start = time.perf_counter()
+        digits = next(digit_stream, None)
+        time_to_convert += time.perf_counter() - start
+        if digits is None:
+            break
+        if first:
+            digits = digits[:1] + '.' + digits[1:]
+            first = False
+        start = time.perf_counter()
+        outfile.write(digits)
+        time_to_write += time.perf_counter() - start
+    return time_to_convert, time_to_write
+
+def pack_digits(digits,fmt):
+    """ pack_digits turns a string of decimal digits into a binary format's bytes
+        :param string digits: for u64 a multiple of 19 long except at the very end, for bcd an even length except at the end
+        :param string fmt: "bcd" two digits a byte, high nibble first, or "u64"/"ycd" 19 digits in a little endian uint64
+        :return bytes: an odd digit out is padded with an F nibble, a short word with zeros on the right
+        """
+    if fmt == "bcd":
+        return bytes.fromhex(digits + "f" * (len(digits) % 2))
+    words = [int(digits[i:i + U64_DIGITS].ljust(U64_DIGITS, "0")) for i in range(0, len(digits), U64_DIGITS)]
+    return struct.pack("<{}Q".format(len(words)), *words)
+
+def ycd_header(ndigits,first_digits,block):
+    """ The y-cruncher-like text at the front of a ycd file, up to the nul after EndHeader """
+    return ("#Compressed Digit File\n\nFileVersion:\t1.1.0\n\nBase:\t10\n\nFirstDigits:\t{}\n\nTotalDigits:\t{}\n\n"
+        "Blocksize:\t{}\nBlocks:\t{}\n\nEndHeader\n\n".format(first_digits, ndigits, block, -(-ndigits // block))
+        ).encode("ascii") + b"\0"
+
+def write_pi_packed(outfile,pi,ndigits,fmt="bcd",converter=None):
+    """ write_pi_packed is write_pi() for the binary formats, DigitFile reads them back
+        They hold the digits after the point, the 3 is taken as read.
+        bcd and u64 start with a DIGIT_HEADER: magic, format, digits and block size (0).
+        ycd starts with a y-cruncher-like text header, then a uint64 file offset for each block of YCD_BLOCK digits,
+        then the blocks.  Each block starts on a word of its own so a digit's block and word come straight from its
+        position, the index is there so a reader never has to assume the layout.
+        :param file outfile: binary file open for writing
+        :param mpz pi: pi * 10**ndigits
+        :param int ndigits: digits after the decimal
+        :param string fmt: bcd, u64 or ycd
+        :param RadixConverter converter: does the conversion, None for a serial one
+        :return tuple (seconds converting, seconds writing)
+        """
+    converter = converter or RadixConverter()
+    block = YCD_BLOCK if fmt == "ycd" else U64_DIGITS if fmt == "u64" else 2  # digits packed together
+    time_to_convert = time_to_write = 0
+    start = time.perf_counter()
+    fraction = pi - 3 * pow(mpz(10), ndigits)
+    if fmt == "ycd":
+        first = fraction // pow(mpz(10), max(ndigits - 50, 0))
+        outfile.write(ycd_header(ndigits, "3." + first.digits().zfill(min(ndigits, 50)), block))
+        words = -(-block // U64_DIGITS)
+        index_start = outfile.tell()
+        blocks = -(-ndigits // block)
+        offsets = [index_start + 8 * blocks + 8 * words * i for i in range(blocks)]
+        outfile.write(struct.pack("<{}Q".format(blocks), *offsets))
+    else:
+        outfile.write(struct.pack(DIGIT_HEADER, DIGIT_MAGIC, fmt.encode("ascii").ljust(4), ndigits, 0))
+    time_to_write += time.perf_counter() - start
+    pending = ""  # digits that didn't fill a block yet
+    done = 0
+    digit_stream = converter.convert(fraction, ndigits)
+    del fraction
+    while True:
+        start = time.perf_counter()
+        digits = next(digit_stream, None)
+        if digits is None:
+            cut = len(pending)  # the end, a short block is padded
+        else:
+            pending += digits
+            cut = (done + len(pending)) // block * block - done  # the rest waits for the next chunk to fill its block
+        if fmt == "ycd":
+            packed = b"".join(pack_digits(pending[i:min(i + block, cut)], fmt) for i in range(0, cut, block))
+        else:
+            packed = pack_digits(pending[:cut], fmt)
+        done += cut
+        pending = pending[cut:]
+        time_to_convert += time.perf_counter() - start
+        start = time.perf_counter()
+        outfile.write(packed)
+        time_to_write += time.perf_counter() - start
+        if digits is None:
+            break
+    return time_to_convert, time_to_write
+
+class DigitFile:
+    """ Random access to the digits after the point in a file from write_pi_packed() or a 3.1415... text file
+        The file is memory mapped and digits() only decodes the bytes covering the range asked for, so a lookup
+        costs the same at digit 10 as at digit 1,000,000,000
+    """
+    def __init__(self,path):
+        """ Initialization
+        :param string path: text, bcd, u64 or ycd file, the format is worked out from the start of the file
+        :throws ValueError if it isn't one of ours
+        """
+        self.path = path
+        with open(path, mode='rb') as infile:
+            self.map = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        self.block = 0
+        self.offsets = None
+        if self.map[:len(DIGIT_MAGIC)] == DIGIT_MAGIC:
+            __, fmt, self.ndigits, self.block = struct.unpack_from(DIGIT_HEADER, self.map)
+            self.format = fmt.decode("ascii").strip()
+            self.data = struct.calcsize(DIGIT_HEADER)
+        elif self.map[:22] == b"#Compressed Digit File":
+            self.format = "ycd"
+            end = self.map.find(b"EndHeader")
+            self.data = self.map.find(b"\0", end) + 1
+            fields = dict(line.split("\t", 1) for line in self.map[:end].decode("ascii").splitlines() if "\t" in line)
+            self.ndigits, self.block = int(fields["TotalDigits:"]), int(fields["Blocksize:"])
+            blocks = -(-self.ndigits // self.block)
+            self.offsets = struct.unpack_from("<{}Q".format(blocks), self.map, self.data)
+        elif self.map[:2] == b"3.":
+            self.format = "text"
+            self.data = 2
+            self.ndigits = len(self.map) - 2 - (self.map[-1:] == b"\n")
+        else:
+            self.map.close()
+            raise ValueError("{} isn't a digit file".format(path))
+        if self.format not in DIGIT_FORMATS:
+            raise ValueError("{} has an unknown format {!r}".format(path, self.format))
+
+    def __len__(self):
+        return self.ndigits
+
+    def close(self):
+        self.map.close()
+
+    def words(self,offset,first,last):
+        """ u64 words first to last (inclusive) starting at byte offset, as one string of digits """
+        count = last - first + 1
+        return "".join("{:019d}".format(word) for word in struct.unpack_from("<{}Q".format(count), self.map, offset + 8 * first))
+
+    def digits(self,start,stop):
+        """ Digits after the point, 0 is the 1 in 3.14
+        :param int start: first digit
+        :param int stop: one past the last, cut to the end of the file
+        :return string
+        """
+        stop = min(stop, self.ndigits)
+        if start >= stop:
+            return ""
+        if self.format == "text":
+            return self.map[self.data + start:self.data + stop].decode("ascii")
+        if self.format == "bcd":
+            return self.map[self.data + start // 2:self.data + (stop + 1) // 2].hex()[start % 2:start % 2 + stop - start]
+        if self.format == "u64":
+            text = self.words(self.data, start // U64_DIGITS, (stop - 1) // U64_DIGITS)
+            return text[start % U64_DIGITS:start % U64_DIGITS + stop - start]
+        pieces = []  # ycd, block by block
+        for block in range(start // self.block, (stop - 1) // self.block + 1):
+            lo = max(start, block * self.block) - block * self.block
+            hi = min(stop, (block + 1) * self.block) - block * self.block
+            text = self.words(self.offsets[block], lo // U64_DIGITS, (hi - 1) // U64_DIGITS)
+            pieces.append(text[lo % U64_DIGITS:lo % U64_DIGITS + hi - lo])
+        return "".join(pieces)
+
+def index_chunk(task):
+    """ index_chunk sorts the positions of the k-grams starting in one chunk of a digit file by k-gram and writes
+        them and the chunk's table of where each k-gram starts, Pool entry point
+        :param tuple task: (digit file, index file, first position, one past the last, gram length, file offset)
+        :return int positions indexed
+        """
+    from array import array
+    from bisect import bisect_left
+    digit_path, index_path, start, stop, gram, offset = task
+    digit_file = DigitFile(digit_path)
+    try:
+        text = digit_file.digits(start, stop + gram - 1)
+    finally:
+        digit_file.close()
+    count = stop - start
+    grams = list(map(int, map(text.__getitem__, map(slice, range(count), range(gram, count + gram)))))
+    del text
+    order = array('I', sorted(range(count), key=grams.__getitem__))  # stable, so each k-gram's positions stay in order
+    ordered = list(map(grams.__getitem__, order))
+    del grams
+    table = array('I', [bisect_left(ordered, g) for g in range(10 ** gram + 1)])
+    if sys.byteorder == "big":
+        table.byteswap()
+        order.byteswap()
+    with open(index_path, mode='r+b') as outfile:
+        os.pwrite(outfile.fileno(), table.tobytes() + order.tobytes(), offset)
+    return count
+
+class DigitIndex:
+    """ Where a run of digits turns up in a digit file, for --search
+        The positions of every k-gram (INDEX_GRAM digits) are sorted by k-gram a chunk of INDEX_CHUNK at a time,
+        each chunk has a table of where each k-gram's positions start, so a lookup reads two table entries and the
+        positions between them in every chunk.  Longer patterns are checked against the digit file, shorter ones
+        are counted from the tables.  Chunks are a fixed size so they are built side by side in a Pool.
+        The index and the digits are both memory mapped.  Positions count from 0, the 1 in 3.14
+    """
+    def __init__(self,path,digit_file):
+        """ Initialization
+        :param string path: index file from build()
+        :param DigitFile digit_file: the digits it indexes
+        :throws ValueError if it isn't an index or the digit file changed since it was built
+        """
+        self.path = path
+        self.digit_file = digit_file
+        with open(path, mode='rb') as infile:
+            self.map = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.gram, __, self.ndigits, self.chunk, size = struct.unpack_from(INDEX_HEADER, self.map)
+        if magic != INDEX_MAGIC:
+            self.map.close()
+            raise ValueError("{} isn't a digit index".format(path))
+        if self.ndigits != len(digit_file) or size != os.path.getsize(digit_file.path):
+            self.map.close()
+            raise ValueError("{} is out of date for {}".format(path, digit_file.path))
+        self.grams = max(self.ndigits - self.gram + 1, 0)  # positions with a whole k-gram after them
+        self.chunks = -(-self.grams // self.chunk)
+        self.table_size = 4 * (10 ** self.gram + 1)
+        self.stride = self.table_size + 4 * self.chunk
+
+    @classmethod
+    def build(cls,digit_path,index_path=None,workers=None,gram=INDEX_GRAM,chunk=INDEX_CHUNK):
+        """ Index a digit file, the chunks are sorted in a Pool and written straight into place
+        :param string digit_path: text, bcd, u64 or ycd file
+        :param string index_path: where the index goes, None for digit_path + ".idx"
+        :param int workers: processes, None for one per core
+        :param int gram: k-gram length
+        :param int chunk: positions sorted together
+        :return DigitIndex
+        """
+        index_path = index_path or digit_path + ".idx"
+        digit_file = DigitFile(digit_path)
+        ndigits = len(digit_file)
+        grams = max(ndigits - gram + 1, 0)
+        bounds = list(range(0, grams, chunk)) + [grams]
+        table_size = 4 * (10 ** gram + 1)
+        stride = table_size + 4 * chunk
+        header = struct.pack(INDEX_HEADER, INDEX_MAGIC, gram, 0, ndigits, chunk, os.path.getsize(digit_path))
+        tmp_name = index_path + ".tmp"
+        with open(tmp_name, mode='wb') as outfile:
+            outfile.write(header)
+            outfile.truncate(len(header) + (len(bounds) - 2) * stride + table_size + 4 * (grams - bounds[-2])
+                if grams else len(header))
+        tasks = [(digit_path, tmp_name, a, b, gram, len(header) + j * stride) for j, (a, b) in enumerate(zip(bounds, bounds[1:]))]
+        processes = min(workers or os.cpu_count() or 1, len(tasks))
+        logging.debug("Indexing {:,} digits of {} in {} chunks with {} processes".format(ndigits, digit_path, len(tasks), processes))
+        mapper = get_pool(processes).imap_unordered if processes > 1 else map
+        for __ in mapper(index_chunk, tasks):
+            pass
+        os.replace(tmp_name, index_path)
+        return cls(index_path, digit_file)
+
+    def close(self):
+        self.map.close()
+
+    def bucket(self,chunk,low,high):
+        """ File offsets of the positions in chunk for k-grams low to high - 1 """
+        offset = struct.calcsize(INDEX_HEADER) + chunk * self.stride
+        start, = struct.unpack_from("<I", self.map, offset + 4 * low)
+        stop, = struct.unpack_from("<I", self.map, offset + 4 * high)
+        return offset + self.table_size + 4 * start, offset + self.table_size + 4 * stop
+
+    def positions(self,chunk,first,last):
+        """ Positions from chunk's bucket at file offsets first to last, in order """
+        count = (last - first) // 4
+        return [chunk * self.chunk + p for p in struct.unpack_from("<{}I".format(count), self.map, first)]
+
+    def matches(self,pattern):
+        """ Every position pattern starts at, in order, for patterns at least as long as the k-gram
+        :param string pattern: digits
+        :return generator of int positions
+        """
+        g = int(pattern[:self.gram])
+        for chunk in range(self.chunks):
+            first, last = self.bucket(chunk, g, g + 1)
+            for position in self.positions(chunk, first, last):
+                if len(pattern) == self.gram or self.digit_file.digits(position, position + len(pattern)) == pattern:
+                    yield position
+
+    def scan(self,pattern,start=0,stop=None):
+        """ Positions pattern starts at between start and stop found by reading the digits, for the short ones
+        :return generator of int positions
+        """
+        stop = self.ndigits if stop is None else stop
+        for offset in range(start, stop, DIGIT_CHUNK):
+            text = self.digit_file.digits(offset, min(offset + DIGIT_CHUNK, stop) + len(pattern) - 1)
+            found = text.find(pattern)
+            while found >= 0 and offset + found < stop:
+                yield offset + found
+                found = text.find(pattern, found + 1)
+
+    def check(self,pattern):
+        """ Make sure a pattern is something we can look up """
+        if not pattern or not pattern.isdigit() or not pattern.isascii():
+            raise ValueError("{!r} isn't a run of digits".format(pattern))
+
+    def first(self,pattern):
+        """ Where pattern first turns up
+        :param string pattern: digits
+        :return int position, None if it isn't there
+        """
+        self.check(pattern)
+        found = self.matches(pattern) if len(pattern) >= self.gram else self.scan(pattern)
+        return next(found, None)
+
+    def count(self,pattern):
+        """ How many times pattern turns up, overlapping ones count
+        :param string pattern: digits
+        :return int
+        """
+        self.check(pattern)
+        if len(pattern) > self.ndigits:
+            return 0
+        if len(pattern) >= self.gram:
+            return sum(1 for __ in self.matches(pattern))
+        scale = 10 ** (self.gram - len(pattern))  # every k-gram starting with the pattern
+        low = int(pattern) * scale
+        total = 0
+        for chunk in range(self.chunks):
+            first, last = self.bucket(chunk, low, low + scale)
+            total += (last - first) // 4
+        return total + sum(1 for __ in self.scan(pattern, self.grams))  # the last few digits aren't a whole k-gram
+
+def index_digits(file_name,ndigits,workers=None):
+    """ index_digits is --index, a DigitIndex next to the digit file just written
+        :param string file_name: -f, there is nothing to index for stdout or no file
+        :param int ndigits: digits after the decimal, for the log
+        :param int workers: processes to sort the chunks
+        """
+    if file_name in ("-", "No File"):
+        logging.warning("--index needs an -f file to index")
+        return
+    with METRICS.phase("index"):
+        start = time.time()
+        DigitIndex.build(file_name,workers=workers).close()
+        logging.info("Indexed {:,} digits of π in {}.idx in {}"
+            .format(ndigits,file_name,str(timedelta(seconds=time.time() - start))))
+
+def pi_string(pi):
+    """ pi_string formats a whole pi * 10**ndigits as one 3.1415... string
+        :param mpz pi: pi * 10**ndigits
+        :return string: digits with a '.' after the 3
+        """
+    pi_s = pi.digits()  # gmpy2's digits() returns a string of the mpz int '314....'
+    return f"{pi_s[:1]}.{pi_s[1:]}"
+
+def last_digits(pi,ndigits,count=5):
+    """ last_digits pulls the last few digits of pi * 10**ndigits for a cross check
+        :param mpz pi: pi * 10**ndigits
+        :param int ndigits: digits after the decimal
+        :param int count: how many digits
+        :return string: last count digits (fewer if there aren't that many)
+        """
+    return str(pi % pow(10, count)).zfill(min(count, ndigits + 1))
+
+def check_last_digits(end_digits,ndigits):
+    """ check_last_digits compares the last 5 digits against the known values and says how it went
+        :param string end_digits: last 5 digits of the answer
+        :param int ndigits: digits after the decimal
+        :return string: "ok", "WRONG" or "unchecked"
+        """
+    if ndigits in LAST_5_DIGITS_OF_PI:
+        if LAST_5_DIGITS_OF_PI[ndigits] == end_digits:
+            logging.info("Last 5 digits of π were {} as expected at offset {:,}"
+                .format(end_digits,ndigits-5 ))
+            return "ok"
+        logging.warning("\n\nWRONG WRONG WRONG\nLast 5 digits were {} and are WRONG should be {}\nWRONG WRONG WRONG\n"
+            .format(end_digits,LAST_5_DIGITS_OF_PI[ndigits]) )
+        return "WRONG"
+    logging.info("Did not check last 5 digits: {} of pi to {:,} digits. It wasn't in the list of known values."
+        .format(end_digits,ndigits) )
+    return "unchecked"
+
+def batch_targets(digits=None,manifest=None,known_max=None,max_digits=MAX_DIGITS):
+    """ batch_targets collects the --batch digit counts and the --batch-file manifest into one list
+        A manifest has one target a line, digits and optionally the file to write, # starts a comment.
+        "known" anywhere stands for every count in LAST_5_DIGITS_OF_PI up to known_max.
+        :param list digits: strings from the command line, 1,000,000 and the like are fine
+        :param string manifest: path of a manifest file, None for none
+        :param int known_max: biggest known count "known" brings in
+        :param int max_digits: biggest count accepted
+        :return list [(int digits, string file name or None)] sorted, one entry per digit count
+        """
+    entries = [(value, None) for value in digits or ()]
+    if manifest:
+        with open(manifest, mode='rt', encoding="utf-8") as infile:
+            for line in infile:
+                fields = line.split("#", 1)[0].split()
+                if fields:
+                    entries.append((fields[0], fields[1] if len(fields) > 1 else None))
+    targets = {}
+    for value, out_name in entries:
+        if value.lower() == "known":
+            for known in LAST_5_DIGITS_OF_PI:
+                if known <= (known_max or known):
+                    targets.setdefault(known, None)
+            continue
+        if not any(c.isdigit() for c in value):
+            raise ValueError("{!r} is not a digit count".format(value))
+        ndigits = range_type(value, rngMin=1, rngMax=max_digits)
+        if out_name or ndigits not in targets:
+            targets[ndigits] = out_name
+    if not targets:
+        raise ValueError("No digit counts to batch")
+    return sorted(targets.items())
+
+def batch_file_name(template,ndigits,fmt="text"):
+    """ batch_file_name makes each target's file name from -f
+        {digits} in the template is replaced, otherwise the digits go in front of the extension, pi.txt -> pi-1000.txt
+        :param string template: -f, None for BATCH_NAME with an extension for the format
+        :param int ndigits: the target
+        :param string fmt: --format
+        :return string file name
+        """
+    if not template:
+        template = BATCH_NAME + (".txt" if fmt == "text" else "." + fmt)
+    if "{digits}" in template:
+        return template.replace("{digits}", str(ndigits))
+    root, extension = os.path.splitext(template)
+    return "{}-{}{}".format(root, ndigits, extension)
+
+def batch_write(task):
+    """ batch_write writes one batch target, Pool entry point
+        :param tuple task: (pi * 10**ndigits, maybe a SharedValue, ndigits, file name, format)
+        :return tuple (seconds converting, seconds writing)
+        """
+    value, ndigits, out_name, fmt = task
+    pi = unshare([value])[0]
+    if fmt == "text":
+        with open(out_name, mode='wt', encoding="utf-8") as outfile:
+            return write_pi(outfile, pi, ndigits)
+    with open(out_name, mode='wb') as outfile:
+        return write_pi_packed(outfile, pi, ndigits, fmt)
+
+def write_batch(pi,ndigits,targets,fmt="text",workers=None):
+    """ write_batch cuts every target out of one answer, checks its last 5 digits and writes the files in a Pool
+        The targets are cut biggest first, each from the one before, so the divisions shrink as they go.
+        A file per process, the converters are serial, so a few big targets still keep the cores busy.
+        :param mpz pi: pi * 10**ndigits
+        :param int ndigits: digits after the decimal, at least the biggest target
+        :param list targets: [(digits, file name)] from batch_targets() with the names filled in, None just checks
+        :param string fmt: --format for every file
+        :param int workers: processes writing files, None for one per core
+        :return list of dicts in target order: digits, file, last 5 digits, check and the seconds for each step
+        """
+    results, tasks = [], []
+    processes = min(workers or os.cpu_count() or 1, sum(1 for __, out_name in targets if out_name))
+    prefix, prefix_digits = pi, ndigits
+    for target, out_name in sorted(targets, reverse=True):
+        start = time.perf_counter()
+        if target < prefix_digits:
+            prefix = prefix // pow(mpz(10), prefix_digits - target)
+            prefix_digits = target
+        end_digits = last_digits(prefix, target)
+        result = {"digits": target, "file": out_name, "last_digits": end_digits,
+            "check": check_last_digits(end_digits, target), "cut_seconds": time.perf_counter() - start}
+        results.append(result)
+        if out_name and processes > 1:  # Shared as we go, so only the prefix being cut is an mpz here
+            tasks.append((result, (share([prefix])[0], target, out_name, fmt)))
+        elif out_name:
+            result["convert_seconds"], result["write_seconds"] = batch_write((prefix, target, out_name, fmt))
+    del prefix
+    if tasks:
+        logging.debug("Writing {} files with {} Pool processes".format(len(tasks), processes))
+        written = get_pool(processes).imap(batch_write, [task for __, task in tasks])
+        for (result, __), (time_to_convert, time_to_write) in zip(tasks, written):
+            result.update({"convert_seconds": time_to_convert, "write_seconds": time_to_write})
+    for result in results:
+        result["seconds"] = sum(result.get(key, 0) for key in ("cut_seconds", "convert_seconds", "write_seconds"))
+        for key in ("seconds", "cut_seconds", "convert_seconds", "write_seconds"):
+            if key in result:
+                result[key] = round(result[key], 4)
+    return results[::-1]
+
+def bbp_terms(task):
+    """ bbp_terms adds up terms start to stop of 16**position * π's BBP series, leaving out the whole numbers
+        Pool entry point, the terms for a window can be shared out over the workers and the sums added up.
+        :param tuple task: (position, bits, start, stop)
+        :return mpz: bits wide fixed point, needs reducing mod 2**bits
+        """
+    position, bits, start, stop = task
+    total = mpz(0)
+    for j, weight in BBP_SERIES:
+        series = mpz(0)
+        for k in range(start, stop):  # 16**(position-k) is huge but only its remainder mod 8k+j matters
+            m = 8 * k + j
+            series += (powmod(16, position - k, m) << bits) // m
+        total += weight * series
+    return total
+
+def bbp_tail(position,bits):
+    """ bbp_tail is the rest of the series after position, each term loses a hex digit """
+    total = mpz(0)
+    for j, weight in BBP_SERIES:
+        k, term = position + 1, mpz(1) << (bits - 4)
+        while term:
+            total += weight * (term // (8 * k + j))
+            term >>= 4
+            k += 1
+    return total
+
+def bbp_hex_digits(position,count=VERIFY_HEX_DIGITS,workers=1):
+    """ bbp_hex_digits gets hex digits of π at an offset without computing any of the digits before them
+        https://en.wikipedia.org/wiki/Bailey%E2%80%93Borwein%E2%80%93Plouffe_formula
+        Time is linear in position, memory is a few small ints. With workers the terms are split over a Pool.
+        :param int position: hex digits after the point to skip, 0 starts at 243f6a88...
+        :param int count: how many hex digits
+        :param int workers: Pool processes to share the terms
+        :return int: the count hex digits as one int
+        """
+    bits = 4 * count + 64  # guard bits soak up the rounding of all the truncated divisions
+    if workers > 1 and position >= BBP_SPLIT_MIN:
+        pieces = workers * 4
+        bounds = [(position + 1) * i // pieces for i in range(pieces + 1)]
+        tasks = [(position, bits, a, b) for a, b in zip(bounds, bounds[1:])]
+        frac = sum(get_pool(workers).imap_unordered(bbp_terms, tasks), mpz(0))
+    else:
+        frac = bbp_terms((position, bits, 0, position + 1))
+    frac += bbp_tail(position, bits)
+    return int((frac & ((1 << bits) - 1)) >> (bits - 4 * count))
+
+def spot_check(position):
+    """ Pool entry point, (position, hex digits) for one --verify spot """
+    return position, bbp_hex_digits(position)
+
+class PiVerifier:
+    """ Checks an answer independently of the formula that made it, for --verify
+        Spot checks pull hex digits at random positions out of BBP and compare them with the same hex digits
+        taken from the decimal answer.  They start in their own Pool before the calculation and are sized from
+        the formula's estimated cost: on idle cores they can take as long as the calculation, otherwise
+        they only get a small share of the time.
+        A second formula can also be run and compared with the answer a chunk at a time.
+    """
+    def __init__(self,ndigits,spots=4,cost=None,workers=1):
+        """ Initialization
+        :param int ndigits: digits after the decimal
+        :param int spots: random positions to check
+        :param float cost: estimated seconds for the calculation, None for no limit on the positions
+        :param int workers: processes the calculation uses
+        """
+        self.ndigits = ndigits
+        last = int(ndigits * HEX_PER_DIGIT) - VERIFY_HEX_DIGITS - 4  # leave room for the decimal answer's truncation
+        if cost is not None:
+            if (os.cpu_count() or 1) - workers >= spots:
+                budget = cost  # each spot has a core to itself
+            else:
+                budget = 2 * VERIFY_FRACTION * cost / spots  # they share, and average half the furthest position
+            last = min(last, max(VERIFY_MIN_POSITION, int(budget / BBP_COST_FACTOR)))
+        self.positions = sorted(random.sample(range(last + 1), min(spots, last + 1))) if last >= 0 else []
+        self.pending = None
+
+    def start(self):
+        """ Start the spot checks running in the background """
+        if self.positions:
+            logging.debug("Spot checking hex digits of π at positions {}".format(self.positions))
+            self.pending = get_pool(len(self.positions), "verify").map_async(spot_check, self.positions)
+
+    def hex_digits(self,pi):
+        """ hex_digits reads the spot positions out of the decimal answer with one multiply and divide
+        :param mpz pi: pi * 10**ndigits
+        :return dict position -> int hex digits
+        """
+        end = self.positions[-1] + VERIFY_HEX_DIGITS
+        frac = pi * pow(mpz(16), end) // pow(mpz(10), self.ndigits)  # π * 16**end, good to the last hex digit or so
+        mask = (1 << 4 * VERIFY_HEX_DIGITS) - 1
+        return {position: int(frac >> 4 * (end - position - VERIFY_HEX_DIGITS)) & mask for position in self.positions}
+
+    def check_spots(self,pi):
+        """ check_spots waits for the spot checks and compares them with the answer
+        :param mpz pi: pi * 10**ndigits
+        :return string: "ok", "WRONG" or "unchecked"
+        """
+        if not self.pending:
+            logging.info("π to {:,} digits is too short to spot check".format(self.ndigits))
+            return "unchecked"
+        found = self.hex_digits(pi)
+        status = "ok"
+        for position, expected in self.pending.get():
+            if found[position] != expected:
+                logging.warning("\n\nWRONG WRONG WRONG\nHex digits at position {:,} were {:0{w}x} and BBP says {:0{w}x}\n"
+                    .format(position,found[position],expected,w=VERIFY_HEX_DIGITS))
+                status = "WRONG"
+        if status == "ok":
+            logging.info("Hex digits of π at {} random positions up to {:,} agree with BBP"
+                .format(len(found),self.positions[-1]))
+        return status
+
+    def compare(self,pi,other,name):
+        """ compare checks the answer against a second formula's a chunk of digits at a time
+        :param mpz pi: pi * 10**ndigits
+        :param mpz other: the second formula's pi * 10**ndigits
+        :param string name: the second formula, for the log
+        :return string: "ok" or "WRONG"
+        """
+        converter = RadixConverter()
+        offset = 0
+        for ours, theirs in zip(converter.chunks(pi, self.ndigits + 1), converter.chunks(other, self.ndigits + 1)):
+            if ours != theirs:
+                first = next(i for i, (a, b) in enumerate(zip(ours, theirs)) if a != b)
+                logging.warning("\n\nWRONG WRONG WRONG\n{} disagrees from digit {:,} on\n".format(name,offset + first))
+                return "WRONG"
+            offset += len(ours)
+        logging.info("All {:,} digits agree with {}".format(self.ndigits,name))
+        return "ok"
+
+    def verify(self,pi,check,second=None,workers=None):
+        """ verify waits for the spot checks, runs the second formula if there is one, and folds both into check
+        :param mpz pi: pi * 10**ndigits
+        :param string check: what check_last_digits() said
+        :param PiFormula second: formula to compare with, None for spot checks only
+        :param int workers: processes for the second formula
+        :return string: "WRONG" if anything disagreed, "verified" for an unchecked answer that passed, else check
+        """
+        start = time.time()
+        verified = self.check_spots(pi)
+        if second:
+            logging.info("Verifying with {}".format(second.describe()))
+            other = second.make(self.ndigits,workers).compute_int()[0]
+            if self.compare(pi,other,second.short_name) == "WRONG":
+                verified = "WRONG"
+            elif verified != "WRONG":
+                verified = "ok"
+            del other
+        logging.info("Verification took {} after the calculation.".format(str(timedelta(seconds=time.time() - start))))
+        if verified == "WRONG":
+            return "WRONG"
+        if verified == "ok" and check == "unchecked":
+            return "verified"
+        return check
+
+class DigitCache:
+    """ Keeps the longest π computed so far as 3.1415... text in a cache directory, with a JSON index saying
+        how many digits it holds, which formula made it and how it was checked
+        Any request for no more digits than are stored is a slice of the memory mapped file, no computing at all.
+        Only a bigger request computes, and its answer replaces the file, cut down to the max_digits limit
+        since a prefix of π is just as good for every smaller request.
+    """
+    FILE_NAME = "pi-digits.txt"
+    INDEX_NAME = "pi-digits.json"
+    LOCK_NAME = "pi-digits.lock"
+    COPY_CHUNK = 1 << 24  # bytes copied at a time out of the mmap
+
+    def __init__(self,directory,max_digits=None):
+        """ Initialization
+        :param string directory: where the digits and index live, created if needed
+        :param int max_digits: most digits kept, None for no limit
+        """
+        self.directory = directory
+        self.max_digits = max_digits
+        self.path = os.path.join(directory, self.FILE_NAME)
+        self.index_path = os.path.join(directory, self.INDEX_NAME)
+        self.lock_path = os.path.join(directory, self.LOCK_NAME)
+        os.makedirs(directory, exist_ok=True)
+        self.index = self.read_index()
+        self.digits_map = None
+
+    def read_index(self):
+        """ The index, or an empty one if there is no (usable) cache yet """
+        try:
+            with open(self.index_path, mode='rt', encoding="utf-8") as infile:
+                index = json.load(infile)
+            if os.path.getsize(self.path) == index["digits"] + 2:  # 3. and the digits
+                return index
+            logging.warning("Digit cache {} doesn't match its index, ignoring it".format(self.path))
+        except (OSError, ValueError, KeyError):
+            pass
+        return {"digits": 0}
+
+    def write_index(self,index=None):
+        """ Write the index (ours if None) over the old one, call it holding locked() """
+        tmp_name = self.index_path + ".tmp"
+        with open(tmp_name, mode='wt', encoding="utf-8") as outfile:
+            json.dump(self.index if index is None else index, outfile, indent=1, ensure_ascii=False)
+        os.replace(tmp_name, self.index_path)
+
+    @contextmanager
+    def locked(self):
+        """ An exclusive flock on the lock file, so processes sharing the directory don't lose each other's updates """
+        with open(self.lock_path, mode='a') as lockfile:
+            fcntl.flock(lockfile, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lockfile, fcntl.LOCK_UN)
+
+    def has(self,ndigits):
+        """ True when ndigits can be served without computing """
+        return 0 < ndigits <= self.index["digits"]
+
+    def digits(self,start,stop):
+        """ Slice of the cached text, 0 is the 3 and 1 is the '.'
+        :return bytes
+        """
+        if self.digits_map is None:
+            with open(self.path, mode='rb') as infile:
+                self.digits_map = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.digits_map[start:stop]
+
+    def last_digits(self,ndigits,count=5):
+        return self.digits(max(ndigits + 2 - count, 2), ndigits + 2).decode("ascii")
+
+    def value(self,ndigits):
+        """ The cached digits back as a number, for checks that need more than the text
+        :return mpz: pi * 10**ndigits
+        """
+        return mpz((self.digits(0, 1) + self.digits(2, ndigits + 2)).decode("ascii"))
+
+    def write(self,outfile,ndigits):
+        """ Copy 3.1415... to ndigits from the cache to an open text file
+        :return float seconds it took
+        """
+        start = time.time()
+        for offset in range(0, ndigits + 2, self.COPY_CHUNK):
+            outfile.write(self.digits(offset, min(offset + self.COPY_CHUNK, ndigits + 2)).decode("ascii"))
+        with self.locked():  # count the hit on the index as it is now, another process may have counted some too
+            index = self.read_index()
+            if index["digits"]:
+                index["hits"] = index.get("hits", 0) + 1
+                index["last_used"] = time.strftime("%Y-%m-%d %H:%M:%S")
+                self.write_index(index)
+        return time.time() - start
+
+    def store(self,pi,ndigits,formula,check,text_file=None,converter=None):
+        """ Replace the cache with a longer answer, cut to max_digits
+        :param mpz pi: pi * 10**ndigits
+        :param int ndigits: digits after the decimal
+        :param string formula: name of the formula that computed it
+        :param string check: how the last 5 digits checked out, WRONG answers are never stored
+        :param string text_file: 3.1415... file already written for this answer, copied instead of converting again
+        :param RadixConverter converter: used when there is no text file
+        """
+        keep = min(ndigits, self.max_digits or ndigits)
+        if check == "WRONG" or keep <= self.index["digits"]:
+            return
+        start = time.time()
+        tmp_name = self.path + ".tmp"
+        if text_file:
+            with open(text_file, mode='rb') as infile, open(tmp_name, mode='wb') as outfile:
+                remaining = keep + 2
+                while remaining:
+                    block = infile.read(min(remaining, self.COPY_CHUNK))
+                    outfile.write(block)
+                    remaining -= len(block)
+        else:
+            with open(tmp_name, mode='wt', encoding="utf-8") as outfile:
+                write_pi(outfile, pi // pow(mpz(10), ndigits - keep) if keep < ndigits else pi, keep, converter)
+        if self.digits_map is not None:
+            self.digits_map.close()
+            self.digits_map = None
+        with self.locked():
+            os.replace(tmp_name, self.path)
+            self.index = {"digits": keep,
+                "formula": formula,
+                "check": check if keep == ndigits else "prefix of {:,} digits, {}".format(ndigits, check),
+                "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "hits": 0}
+            self.write_index()
+        logging.info("Cached {:,} digits of π in {} in {:.2f} seconds".format(keep, self.path, time.time() - start))
+
+class PiCheckpoint:
+    """ Saves intermediate mpz/mpfr values to a directory so a killed run can pick up with --resume
+        Each key is one file holding gmpy2 to_binary() blobs, each prefixed with its length
+    """
+    def __init__(self,directory,resume=False):
+        """ Initialization
+        :param string directory: where the checkpoint files live, created if needed
+        :param bool resume: load saved values, otherwise every load() misses
+        """
+        self.directory = directory
+        self.resume = resume
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self,key):
+        return os.path.join(self.directory, key + ".ckpt")
+
+    def save(self,key,values):
+        """ Write values to the key's file.  A temp file is renamed over the old one so a crash never leaves half a checkpoint
+        :param string key: name of the checkpoint
+        :param list values: mpz, mpfr or int values
+        """
+        tmp_name = self.path(key) + ".tmp"
+        with open(tmp_name, mode='wb') as ckfile:
+            ckfile.write(CHECKPOINT_MAGIC + struct.pack('<Q', len(values)))
+            for value in values:
+                blob = to_binary(mpz(value) if isinstance(value, int) else value)
+                ckfile.write(struct.pack('<Q', len(blob)))
+                ckfile.write(blob)
+            ckfile.flush()
+            os.fsync(ckfile.fileno())
+        os.replace(tmp_name, self.path(key))
+
+    def exists(self,key):
+        return os.path.exists(self.path(key))
+
+    def read(self,key):
+        """ Read back the values saved under key, resuming or not.  One value is read at a time so a spilled
+            subtree doesn't need twice its size in memory
+        :param string key: name of the checkpoint
+        :return list of values or None if the checkpoint is missing or damaged
+        """
+        if not self.exists(key):
+            return None
+        with open(self.path(key), mode='rb') as ckfile:
+            try:
+                if ckfile.read(len(CHECKPOINT_MAGIC)) != CHECKPOINT_MAGIC:
+                    raise ValueError("bad magic")
+                values = []
+                for i in range(struct.unpack('<Q', ckfile.read(8))[0]):
+                    size = struct.unpack('<Q', ckfile.read(8))[0]
+                    blob = ckfile.read(size)
+                    if len(blob) != size:
+                        raise ValueError("truncated")
+                    values.append(from_binary(blob))
+                    del blob
+            except (ValueError, TypeError, struct.error) as e:
+                logging.warning("Ignoring damaged checkpoint {}: {}".format(self.path(key), e))
+                return None
+        return values
+
+    def load(self,key):
+        """ Read back the values saved under key
+        :param string key: name of the checkpoint
+        :return list of values or None if we are not resuming or the checkpoint is missing or damaged
+        """
+        if not self.resume:
+            return None
+        return self.read(key)
+
+    def load_all(self,keys):
+        """ Load several checkpoints that only make sense together
+        :param list keys: checkpoint names
+        :return list of value lists or None if any of them is missing
+        """
+        found = []
+        for key in keys:
+            values = self.load(key)
+            if values is None:
+                return None
+            found.append(values)
+        return found
+
+    def clear(self,prefix):
+        """ Remove every checkpoint whose key starts with prefix """
+        for fname in os.listdir(self.directory):
+            if fname.startswith(prefix) and (fname.endswith(".ckpt") or fname.endswith(".ckpt.tmp")):
+                os.remove(os.path.join(self.directory, fname))
+
+def merge_pqbt(pair):
+    """ merge_pqbt combines two adjacent binary splitting results for a series with a 1/b(k) in each term, like arctan
+        The range [a, b) sums to T / (B * Q)
+        :param tuple pair: ([p, q, b, t] for [a, m), [p, q, b, t] for [m, b))
+        :return list [p, q, b, t] for the range [a, b)
+        """
+    (p_am, q_am, b_am, t_am), (p_mb, q_mb, b_mb, t_mb) = pair
+    return [p_am * p_mb, q_am * q_mb, b_am * b_mb, b_mb * q_mb * t_am + b_am * p_am * t_mb]
+
+def merge_pqt_shared(pair):
+    """ Pool entry point for merge_pqt() with shared memory in and out """
+    return share(merge_pqt((unshare(pair[0]), unshare(pair[1]))))
+
+def merge_pqbt_shared(pair):
+    """ Pool entry point for merge_pqbt() with shared memory in and out """
+    return share(merge_pqbt((unshare(pair[0]), unshare(pair[1]))))
+
+def multiply_shared(pair):
+    """ Pool entry point, one big product with shared memory in and out """
+    a, b = unshare(pair)
+    return share([a * b])
+
+#Classes for various Pi formulae
+
+class PiEngine:
+    """ Common part of the formula classes.  Each one implements compute_int() which returns
+        (pi * 10**ndigits as an mpz, iterations, seconds) and gets compute() for the string version
+        The cost and memory guesses scale a measured constant by n * log2(n)**2, the shape of a
+        binary splitting or AGM run with FFT multiplication.  Override them for anything else.
+    """
+    COST_FACTOR = 5e-9  # seconds per n * log2(n)**2, measured at a million digits on one core
+    MEMORY_FACTOR = 8  # peak bytes per digit over the interpreter
+    OUT_OF_CORE_MEMORY_FACTOR = None  # peak bytes per digit spilling to disk, None if it can't
+    BASE_MEMORY = 30 * 1024 * 1024  # the interpreter with gmpy2 loaded
+    MAX_PRACTICAL_DIGITS = None  # --benchmark skips it past this many digits
+    SQRT_SHARE = 0.0  # share of the time in square roots and divisions, the rest is multiplies, for --algo auto
+    PARALLEL = False  # it uses the workers it is given, --algo auto tries it with different counts
+
+    @classmethod
+    def build(cls,formula,ndigits,workers=None,checkpoint=None,spill=None):
+        """ Make an engine for a Formula, each class takes just the options it understands
+        :param Formula formula: the registry entry
+        :param int ndigits: digits of PI computation
+        :param int workers: processes for the formulae that can use them
+        :param PiCheckpoint checkpoint: for the formulae that can checkpoint
+        :param PiCheckpoint spill: for the formulae that can run out of core
+        :return PiEngine
+        """
+        return cls(ndigits)
+
+    @classmethod
+    def default_workers(cls,workers=None):
+        """ Processes the engine really uses when asked for workers, None for its default """
+        return workers or 1
+
+    @classmethod
+    def estimated_cost(cls,formula,ndigits,workers=1):
+        """ Rough seconds to compute ndigits """
+        return cls.COST_FACTOR * ndigits * math.log2(max(ndigits, 2)) ** 2
+
+    @classmethod
+    def estimated_memory(cls,formula,ndigits,workers=1,out_of_core=False):
+        """ Rough peak bytes to compute ndigits, None if there is no out_of_core mode """
+        if out_of_core:
+            return None
+        return cls.BASE_MEMORY + cls.MEMORY_FACTOR * ndigits
+
+    def compute(self):
+        """ Computation, answer as one string
+        :return tuple (string 3.1415..., iterations, seconds)
+        """
+        pi, iters, seconds = self.compute_int()
+        return pi_string(pi), iters, seconds
+
+class PiAGM(PiEngine):
+    COST_FACTOR = 5.2e-9
+    MEMORY_FACTOR = 7
+    SQRT_SHARE = 0.6
+
+    @classmethod
+    def build(cls,formula,ndigits,workers=None,checkpoint=None,spill=None):
+        return cls(ndigits,checkpoint)
+
+    def __init__(self,ndigits,checkpoint=None):
+        self.ndigits = ndigits
+        self.cdigits = self.ndigits + len(str(self.ndigits))+9      # Extra digits to reduce trailing error More factors means more error
+        self.iters = 0
+        self.start_time = 0
+        self.checkpoint = checkpoint  # PiCheckpoint, the loop state is saved after every iteration
+        self.ckpt_key = "agm-{}".format(ndigits)
+
+    GAP_TERMS = 2  # most series terms gap() adds up instead of a square root, three cost as much as sqrt(a * b)
+    GAP_GUARD = 64  # bits gap() keeps past the ones that reach the answer
+
+    # (2j choose j) / ((2j - 1) * 4**j), 1 - sqrt(1 - u) = sum of these * u**j
+    GAP_SERIES = [math.comb(2 * j, j) / ((2 * j - 1) * 4 ** j) for j in range(1, GAP_TERMS + 1)]
+
+    def gap(self,s,d):
+        """ s - sqrt(a * b), the arithmetic mean less the geometric one, from s = (a + b) / 2 and d = a - b
+            a * b = s**2 - (d/2)**2 so the gap is s * (1 - sqrt(1 - u)) with u = (d / 2s)**2, the series is
+            u/2 + u**2/8 + u**3/16 ...  It starts from the mean we already have, and once a
+            and b agree to more than a quarter of the precision two terms are enough.  The gap is smaller than s by the
+            square of that agreement, so it only needs the precision of the bits it adds and costs a fraction of sqrt().
+            The last iterations of the loop, where a and b are nearly equal, never take a full square root or a * b.
+        :param mpfr s: (a + b) / 2
+        :param mpfr d: a - b
+        :return mpfr the gap, or None while a square root is cheaper
+        """
+        if not d:
+            return mpfr(0)
+        context = get_context()
+        precision = context.precision
+        agree = get_exp(s) - get_exp(d)  # bits a and b have in common, the gap is 2**(-2 * agree) of s
+        if 2 * agree * self.GAP_TERMS < precision + self.GAP_GUARD:
+            return None
+        context.precision = max(precision - 2 * agree, 0) + self.GAP_GUARD
+        try:
+            near = mpfr(s)  # rounded to the precision the gap needs, everything below works at that size
+            half = mpfr(d) / (2 * near)
+            u = half * half
+            terms = -(-(precision + self.GAP_GUARD) // (2 * agree))  # until u**j is below the last bit of s
+            series = mpfr(0)
+            for coefficient in reversed(self.GAP_SERIES[:terms]):
+                series = series * u + coefficient
+            return near * u * series
+        finally:
+            context.precision = precision
+
+    def compute_int(self):
+        # Found formula here: https://www.kurims.kyoto-u.ac.jp/~ooura/pi_fft.html
+        # This is an FFT modified AGM routine  POW() is not used 
+        context = get_context()
+        context.precision = 64  # epsilon only has to say how small e gets, at full precision it was a pow() and a division
+        epsilon = mpfr(1)/pow(mpfr(10),self.ndigits)
+        context.precision=int(self.cdigits * LOG2_10)
+        logging.debug('AGM precision ({:,}) Started '
+            .format(self.ndigits ) )
+        self.start_time = time.time()
+        state = self.checkpoint.load(self.ckpt_key) if self.checkpoint else None
+        if state:
+            a, b, c, e, npow, iters = state
+            npow, self.iters = int(npow), int(iters)
+            logging.info('AGM resuming from checkpoint after {:,} iterations'.format(self.iters))
+        else:
+            if self.checkpoint:
+                self.checkpoint.clear(self.ckpt_key)
+            c = mpfr(sqrt(0.125))
+            a  = mpfr(1 + 3 * c )
+            b  = mpfr(  sqrt(a))
+            e = mpfr(b - 0.625)
+            b *= 2  
+            c = e - c
+            a +=  e
+            npow = 4
+        
+        with METRICS.phase("series"):
+            while e > epsilon:
+                npow *= 2
+                s = (a + b) / 2
+                e = self.gap(s, a - b)
+                if e is None:  # Still too far apart for the series, the square root is cheaper
+                    b *= a  # The product replaces b instead of living beside it through the square root
+                    b = sqrt(b)
+                    e = s - b
+                else:
+                    b = s - e
+                del s
+                b *= 2
+                c -= e
+                a = b + e
+                self.iters += 1
+                if self.checkpoint:
+                    self.checkpoint.save(self.ckpt_key, [a, b, c, e, npow, self.iters])
+                if self.iters % 10  == 0:
+                    METRICS.progress('AGM', self.iters)
+        # a and b have converged to the AGM
+        with METRICS.phase("division"):  # (a**2 - e - e/2) / (a*c - e) / npow, letting each full size number go once it is used
+            e = e * e / 4
+            a += b
+            del b
+            get_context().precision=int((self.ndigits+2 ) * LOG2_10)
+            pi = a * a
+            pi -= e + e / 2
+            c *= a
+            del a
+            c -= e
+            pi /= c
+            del c
+            pi /= npow
+        if self.checkpoint:
+            self.checkpoint.clear(self.ckpt_key)
+        logging.debug('AGM Done! {:,} iterations and {:.2f} seconds.'
+            .format(self.iters,time.time() - self.start_time) )
+        return  mpfr_to_int(pi,self.ndigits),self.iters,time.time()-self.start_time
+
+class PiBellard(PiEngine):
+    COST_FACTOR = 8e-8  # seconds per n**2, it is quadratic
+    MEMORY_FACTOR = 2
+    MAX_PRACTICAL_DIGITS = 10000
+
+    @classmethod
+    def estimated_cost(cls,formula,ndigits,workers=1):
+        return cls.COST_FACTOR * ndigits * ndigits
+
+    def __init__(self,ndigits):
+        self.ndigits = ndigits
+        self.iters = 0
+        self.start_time = 0
+        self.iter_time = 0
+
+    def compute_int(self):
+        """
+        http://en.wikipedia.org/wiki/Bellard%27s_formula
+        https://en.wikipedia.org/wiki/Bailey%E2%80%93Borwein%E2%80%93Plouffe_formula
+        """
+        cdigits = self.ndigits+15
+        get_context().precision=int(cdigits * LOG2_10) # Precision isn't digits  
+        self.start_time = time.time()  # Start the clock for total time
+        logging.debug('BBP precision({:,}) Started '
+            .format(self.ndigits ) )
+        if self.ndigits > 10000:        
+            logging.warning("\nWARNING\nWARNING Will Robinson\nBellard is a generator and will take a very long time if digits is > 10k.\n"
+                "--hex-offset gets hex digits at any offset without the ones before it.\n")
+        pi = mpfr(0)
+        
+        self.iter_time = time.time()
+        for i in range( self.ndigits):
+            k = mpfr(i)
+            a = mpfr(1/(pow(16,k)))
+            b = mpfr(4/(8*k+1))
+            c = mpfr(2/(8*k+4))
+            d = mpfr(1/(8*k+5) )
+            e = mpfr(1/(8*k+6) )
+            r = mpfr(a*(b-c-d-e))
+            pi += r
+            self.iters += 1
+            if self.iters % 10000  == 0:
+                METRICS.progress('Bellard', self.iters, '10k iters took {:.2f}'.format(time.time() - self.iter_time))
+                self.iter_time = time.time()
+            
+        logging.debug('Bellard Done! {:,} iterations and {:.2f} seconds.'
+            .format(self.iters,time.time() - self.start_time) )
+        return mpfr_to_int(pi,self.ndigits),self.iters,time.time()-self.start_time
+
+
+class PiMachin(PiEngine):
+    COST_FACTOR = 6e-9  # binary splitting, scaled by the share of the digits each arctan series has to produce
+    TERM_COST_FACTOR = 7e-10  # binary splitting, the final division for each arctan
+    ATAN2_COST_FACTOR = 1.5e-8  # per arctan, atan2() costs about the same whatever the denominator
+    MEMORY_FACTOR = 25  # per digit, the arctans are summed one at a time so the number of terms hardly matters
+    WORKER_MEMORY_FACTOR = 2  # per digit for each worker, the pieces waiting to be merged
+    SQRT_SHARE = 0.2
+    PARALLEL = True
+
+    @classmethod
+    def build(cls,formula,ndigits,workers=None,checkpoint=None,spill=None):
+        return cls(ndigits,formula.name,formula.denoms,formula.mults,formula.opers,workers,formula.arctan)
+
+    @classmethod
+    def default_workers(cls,workers=None):
+        return workers or os.cpu_count() or 1
+
+    @classmethod
+    def estimated_cost(cls,formula,ndigits,workers=1):
+        size = ndigits * math.log2(max(ndigits, 2)) ** 2
+        if formula.arctan == "bs":
+            # arctan(1/d) needs ndigits / (2 * log10(d)) terms and those split across the workers
+            share = sum(1 / (2 * math.log10(d)) for d in formula.denoms)
+            return size * (cls.COST_FACTOR * share / max(workers, 1) + cls.TERM_COST_FACTOR * len(formula.denoms))
+        # every term runs at once in its own process, so wall time is one term unless there are more terms than cores
+        rounds = math.ceil(len(formula.denoms) / max(workers, 1))
+        return rounds * cls.ATAN2_COST_FACTOR * size
+
+    @classmethod
+    def estimated_memory(cls,formula,ndigits,workers=1,out_of_core=False):
+        if out_of_core:
+            return None
+        extra = workers if workers > 1 else 0  # every worker is another interpreter
+        return cls.BASE_MEMORY * (1 + extra) + (cls.MEMORY_FACTOR + cls.WORKER_MEMORY_FACTOR * extra) * ndigits
+
+    def __init__(self,ndigits,name,denoms,mults,operators,workers=None,arctan="atan2"):
+        """ Initialization
+        :param int digits: digits of PI computation
+        :param string name: name for credit on formula
+        :param list  denoms a lis of ints for the denomiators
+        :param list  mults: a list of ints as multipliyers for the Machin formula
+        :param list operators: a list of 1 or -1 to cause addition or subtraction
+        :param int workers: Pool processes, None for one per core
+        :param string arctan: "atan2" for gmpy2's atan2() or "bs" to binary split the series exactly with integers
+        """
+        self.name = name  # Not used.  Planned to use in logging
+        self.ndigits = ndigits
+        self.denoms = denoms
+        self.mults = mults
+        self.operators = operators
+        self.workers = self.default_workers(workers)
+        self.arctan = arctan
+        self.xdigits = len(denoms)+7              # Extra digits to reduce trailing error More factors means more error
+        self.start_time = 0
+
+    def ArctanDenom(self,d):
+
+        cdigits = self.ndigits+self.xdigits
+        get_context().precision=int(cdigits * LOG2_10)
+        # Calculates arctan(1/d) = 1/d - 1/(3*d^3) + 1/(5*d^5) - 1/(7*d^7) + ...
+        logging.debug('arctan(1/%d) Started  ',d )
+        total = mpfr(0)
+        arc_start_time = time.time()  # Start the clock for this arctan calulation
+        total = mpfr(atan2(mpfr(1),mpfr(d)))
+        logging.debug('arctan(1/{}) Done!   {:.2f} seconds.'
+            .format(int(d),time.time() - arc_start_time))
+        return total,int(1) # I used to calulate arctan by hand.  Now I just use atan2() so just one iteration here
+
+    def arctan_terms(self,d):
+        """ Terms of arctan(1/d) = 1/d - 1/(3*d^3) + ... needed for our digits, each one is worth 2*log10(d) digits """
+        return int((self.ndigits + self.xdigits) / (2 * math.log10(d))) + 2
+
+    def arctan_range(self,task):
+        """ Pool entry point, binary split terms [a, b) of the arctan(1/d) series
+        :param tuple task: (d, a, b)
+        :return list [p, q, b, t]
+        """
+        d, a, b = task
+        return self.__arctan_bs(mpz(d), mpz(d) * mpz(d), a, b)
+
+    def __arctan_bs(self,d,d2,a,b):
+        """ Term k of arctan(1/d) is (-1)**k / ((2k+1) * d**(2k+1)), so p(k) = -1, q(k) = d**2 and b(k) = 2k+1
+            except the first term where p = 1 and q = d.  Same P/Q/T idea as PiChudnovsky.__bs with B for the 2k+1
+        :return list [p, q, b, t]
+        """
+        if b - a == 1:
+            if a == 0:
+                return [mpz(1), d, mpz(1), mpz(1)]
+            return [mpz(-1), d2, mpz(2 * a + 1), mpz(-1)]
+        m = (a + b) // 2
+        return merge_pqbt((self.__arctan_bs(d, d2, a, m), self.__arctan_bs(d, d2, m, b)))
+
+    def arctan_cost(self,d):
+        """ Relative cost of arctan(1/d) at our digits.  Binary splitting work grows with the number of terms,
+            atan2() costs about the same whatever the denominator
+        """
+        return self.arctan_terms(d) if self.arctan == "bs" else 1
+
+    def schedule(self):
+        """ Plan the Pool work so the slowest arctan doesn't set the wall time.  With binary splitting every series
+            is cut into pieces of about the same cost, a few per worker so the last ones fill in the gaps.
+            The pieces are sorted biggest first so the Pool hands out the long ones while there is time to balance
+        :return list of (term index, d, a, b, cost), a and b are the series range (None for atan2)
+        """
+        costs = [self.arctan_cost(d) for d in self.denoms]
+        if self.arctan != "bs":
+            tasks = [(i, d, None, None, costs[i]) for i, d in enumerate(self.denoms)]
+        else:
+            target = sum(costs) / (self.workers * 4)  # four pieces per worker
+            tasks = []
+            for i, d in enumerate(self.denoms):
+                n = self.arctan_terms(d)
+                chunks = max(1, min(n, round(costs[i] / target))) if self.workers > 1 else 1
+                bounds = [n * j // chunks for j in range(chunks + 1)]
+                tasks.extend((i, d, bounds[j], bounds[j+1], costs[i] / chunks) for j in range(chunks))
+        tasks.sort(key=lambda task: -task[4])
+        logging.debug("Scheduled {} arctans as {} pieces on {} Pool processes, biggest piece is {:.1%} of the work"
+            .format(len(self.denoms), len(tasks), self.workers, tasks[0][4] / sum(costs)))
+        return tasks
+
+    def run_task(self,task):
+        """ Pool entry point for one scheduled piece, keeps the task with its result for putting them back in order """
+        __, d, a, b, __ = task
+        return task, (self.ArctanDenom(d) if a is None else self.arctan_range((d, a, b)))
+
+    def run_task_shared(self,task):
+        """ Pool entry point, run_task() with the big numbers handed back through shared memory """
+        task, result = self.run_task(task)
+        return task, share(result)
+
+    def run_schedule(self):
+        """ Run every scheduled piece in one Pool
+        :return list of (task, result) in series order within each term, big results are SharedValue handles
+        """
+        if self.workers > 1:
+            done = list(get_pool(self.workers).imap_unordered(self.run_task_shared, self.schedule()))
+        else:
+            done = list(map(self.run_task, self.schedule()))  # one worker doesn't need a Pool
+        done.sort(key=lambda item: (item[0][0], item[0][2] or 0))
+        return done
+
+    def arctans_bs(self):
+        """ Every arctan(1/d) by binary splitting.  The scheduled pieces of every series go into the Pool together,
+            then each term's pieces are merged back up a level at a time
+        :return list of (mpfr arctan, iterations) in denoms order
+        """
+        terms = [self.arctan_terms(d) for d in self.denoms]
+        if self.workers > 1:
+            mapper, merge = get_pool(self.workers).imap, merge_pqbt_shared
+        else:
+            mapper, merge = map, merge_pqbt
+        levels = [[] for d in self.denoms]
+        for task, piece in self.run_schedule():
+            levels[task[0]].append(piece)
+        while any(len(level) > 1 for level in levels):
+            owners, pairs = [], []
+            for i, level in enumerate(levels):
+                for j in range(0, len(level) - 1, 2):
+                    owners.append(i)
+                    pairs.append((level[j], level[j+1]))
+            merged = [[] for d in self.denoms]
+            for i, pqbt in zip(owners, mapper(merge, pairs)):
+                merged[i].append(pqbt)
+            for i, level in enumerate(levels):
+                if len(level) % 2:
+                    merged[i].append(level[-1])  # the odd piece out moves up a level as it is
+            levels = merged
+        results = []
+        for i, level in enumerate(levels):
+            __, q, b, t = unshare(level[0])
+            results.append((mpfr(t) / (mpfr(b) * mpfr(q)), terms[i]))
+        return results
+    #
+    def compute_int(self):
+        self.start_time = time.time()  # Start the clock for total time
+        ndigits = self.ndigits
+        cdigits = self.ndigits+self.xdigits
+        logging.info("Starting Machin-Like formula to {:,} decimal places"
+            .format(ndigits) )
+        get_context().precision=int(cdigits * LOG2_10)
+        if self.arctan == "bs":
+            results = self.arctans_bs()
+        else:
+            logging.debug("Starting %d Pool threads to calculate arctan values.",
+                self.workers )
+            results = [unshare(result) for task, result in self.run_schedule()]  # longest first, at most workers at a time
+        # Now we have the arctan calculations from the pool threads in results[]
+        # Apply chosen Formula to the results and calculate pi using mults and signs
+        logging.debug ("Now multiplying and summing all arctan results")
+        arctanSum = pi = mpfr(0)
+        iters = 0
+        for i, result in enumerate(results):
+            iters += result[1]  # Keep track of this thread's iterations for later
+            arctanSum += mpfr(mpfr(self.mults[i])*mpfr(result[0])*mpfr(self.operators[i])) # Add or subtract the product from the accumulated arctans
+        pi = mpfr(4) * arctanSum # change pi/4 = x to pi = 4 * x
+        # We calculated extra digits to compensate for roundoff error.
+        # Chop off the extra digits with floor() to ndigits
+        return mpfr_to_int(pi,self.ndigits),iters,time.time()-self.start_time
+
+class slow_chudnovsky:
+    A = mpz(13591409)
+    B = mpz(545140134)
+    C = mpz(640320)
+    D = mpz(426880)
+    E = mpz(10005)
+    """Slower, easer to understand, version of Chudnovsky Bros without Binary Splitting 
+        Not used here  Just left over from earlier testing
+    """
+    def __init__(self,ndigits):
+        """ Initialization
+        :param int ndigits: digits of PI computation
+        """
+        self.ndigits = ndigits
+        # 20 extra digits fluff for lots of calculations
+        self.scale = pow(mpz(10),mpz(ndigits+20))
+        self.iters = mpz(0)
+        self.M10K = mpz(10000)
+        self.k = mpz(1)
+        self.a_k = mpz(self.scale)
+        self.a_sum = mpz(self.scale)
+        self.b_sum = mpz(0)
+        self.C_cubed_over_24 = pow(self.C,mpz(3)) // mpz(24)
+
+    def compute(self):
+        get_context().precision =  int(LOG2_10 * (self.ndigits + 20) )
+        self.start_time = time.time()
+        logging.debug("Starting Chudnovsky formula to {:,} decimal places"
+                .format(self.ndigits) )
+        while True:
+            self.iters += mpz(1)
+            if self.iters % self.M10K  == mpz(0):
+                logging.debug('slow_chudnovsky ... {:,} iterations and {:.2f} seconds.'
+                    .format( int(self.iters),time.time() - self.start_time))
+            self.a_k *= mpz(-(mpz(6)*self.k-mpz(5)) * (mpz(2)*self.k-mpz(1)) * (mpz(6)*self.k-mpz(1)))
+            self.a_k //=  mpz((self.k*self.k*self.k) * self.C_cubed_over_24)
+            self.a_sum += mpz(self.a_k)
+            self.b_sum += mpz(self.k * self.a_k)
+            self.k += mpz(1)
+            if self.a_k == mpz(0):
+                break
+        # convert to a fraction 
+        total_sum = mpfr(self.A * self.a_sum + self.B * self.b_sum)
+        pi = ((self.D * sqrt(self.E)) / total_sum)*self.scale
+        logging.debug('Chudnovsky calulation Done! {:,} iterations and {:.2f} seconds.'
+                .format(int(self.iters),time.time() - self.start_time))
+        # Chop off extra 20 digits 
+        return "{0:.{1}Df}".format(pi,self.ndigits),int(self.iters),time.time() - self.start_time
+
+
+class PiChudnovsky(PiEngine):
+    """Version of Chudnovsky Bros using Binary Splitting 
+        So far this is the winner for fastest time to a million digits on my older intel i7
+        https://gist.github.com/komasaru/c3f5227513e1692c8fba42fe337316bc started here.  Mine is about 15% faster
+    """
+    A = mpz(13591409)
+    B = mpz(545140134)
+    C = mpz(640320)
+    D = mpz(426880)
+    E = mpz(10005)
+    C3_24  = pow(C, mpz(3)) // mpz(24)
+    #DIGITS_PER_TERM = math.log(53360 ** 3) / math.log(10)  #=> 14.181647462725476
+    DIGITS_PER_TERM = 14.181647462725476
+    MMILL = mpz(1000000)
+    LEAF_TERMS = 8  # terms bs_leaf() adds up with small ints, quickest from 1e6 to 1e7 digits
+    LEAF_A, LEAF_B, LEAF_C3_24 = int(A), int(B), int(C3_24)  # plain ints are quicker than mpz at leaf sizes
+    COST_FACTOR = 3e-9
+    MEMORY_FACTOR = 14
+    OUT_OF_CORE_MEMORY_FACTOR = 8  # the last merge, square root and division
+    SQRT_SHARE = 0.25
+    PARALLEL = True
+    PIPELINE_GUARD = 64  # extra bits in the pipelined division, q/t is good to 2**-GUARD of the last digit
+
+    @classmethod
+    def build(cls,formula,ndigits,workers=None,checkpoint=None,spill=None):
+        return cls(ndigits,workers,checkpoint,spill)
+
+    @classmethod
+    def estimated_memory(cls,formula,ndigits,workers=1,out_of_core=False):
+        extra = workers if workers > 1 else 0  # every worker is another interpreter
+        if out_of_core:
+            # Only the merges in flight are in memory, a worker's share of the top of the tree each
+            merging = cls.MEMORY_FACTOR * ndigits // 4 * extra
+            return cls.BASE_MEMORY * (1 + extra) + max(cls.OUT_OF_CORE_MEMORY_FACTOR * ndigits, merging)
+        return cls.BASE_MEMORY * (1 + extra) + cls.MEMORY_FACTOR * ndigits
+
+    @classmethod
+    def estimated_cost(cls,formula,ndigits,workers=1):
+        # The series splits across workers, the last merges, square root and division don't
+        cost = super().estimated_cost(formula,ndigits,workers)
+        return cost * (0.4 + 0.6 / max(workers, 1))
+
+    def __init__(self,ndigits,workers=None,checkpoint=None,spill=None):
+        """ Initialization
+        :param int ndigits: digits of PI computation
+        :param int workers: processes for parallel binary splitting, None or 1 runs serially
+        :param PiCheckpoint checkpoint: save finished subtrees so a killed run can resume, None for no checkpoints
+        :param PiCheckpoint spill: run out of core with the subtrees kept here, None to keep them in memory
+        """
+        self.ndigits = ndigits
+        self.workers = workers or 1
+        self.checkpoint = checkpoint
+        self.spill = spill
+        self.n      = mpz(self.ndigits // self.DIGITS_PER_TERM + 1)
+        self.prec   = mpz((self.ndigits + 1) * LOG2_10)
+        self.one_sq = self.sqrt_c = None
+        if not spill and self.workers < 2:  # out of core the square root waits until the series is on disk
+            with METRICS.phase("sqrt"):
+                self.one_sq = pow(mpz(10),mpz(2 * ndigits))
+                self.sqrt_c = self.sqrt_e()
+        self.iters  = mpz(0)
+        self.start_time = 0
+
+    def sqrt_e(self):
+        """ isqrt(E * 10**(2 * ndigits)), computed for each run and never kept, at 1e9 digits it is 415 MB """
+        return isqrt(self.E * (self.one_sq or pow(mpz(10),mpz(2 * self.ndigits))))
+
+    def sqrt_shared(self):
+        """ Pool entry point, sqrt_e() in its own process while the series is split """
+        return share([self.sqrt_e()])
+
+    def __getstate__(self):
+        """ Pool workers only need the series constants, don't pickle the huge square root to every one of them """
+        state = self.__dict__.copy()
+        state['one_sq'] = state['sqrt_c'] = None
+        return state
+
+    def compute_int(self):
+        """ Computation
+            With workers it is pipelined: the square root runs in a process of its own while the series is split, and
+            the division only needs the series, pi = ((q * D << s) // t) * sqrt_c >> s, so it runs while the square
+            root finishes.  The wall time is about the longer of the two instead of both one after the other.
+        """
+        self.start_time = time.time()
+        logging.debug("Starting Chudnovsky with Binary Splitting formula to {:,} decimal places"
+            .format(self.ndigits) )
+        pending = None
+        if self.sqrt_c is None and not self.spill:
+            logging.debug("Square root in its own process while the series is split")
+            pending = get_pool(1, "sqrt").apply_async(self.sqrt_shared)
+        with METRICS.phase("series"):
+            if self.spill:
+                q, t = self.spill_bs()
+            elif self.workers > 1 or self.checkpoint:
+                __, q, t = self.split_bs()
+            else:
+                __, q, t = self.__bs(mpz(0), self.n, need_p=False)  # p is just for recursion
+        if pending:
+            with METRICS.phase("division"):
+                shift = int(self.prec) + self.PIPELINE_GUARD
+                q *= self.D
+                q <<= shift
+                pi = q // t
+                del q, t
+            with METRICS.phase("sqrt"):  # only the wait for the square root that is left
+                sqrt_c = unshare(pending.get())[0]
+            with METRICS.phase("division"):
+                pi *= sqrt_c
+                pi >>= shift
+            return pi,int(self.iters),time.time() - self.start_time
+        with METRICS.phase("sqrt"):
+            sqrt_c = self.sqrt_c if self.sqrt_c is not None else self.sqrt_e()
+        with METRICS.phase("division"):
+            pi = (q * self.D * sqrt_c) // t
+        logging.debug('Chudnovsky with Binary Splitting calulation Done! {:,} iterations and {:.2f} seconds.'
+            .format( int(self.iters),time.time() - self.start_time))
+        return pi,int(self.iters),time.time() - self.start_time
+
+    def bs_range(self, ab):
+        """ Pool entry point, binary split one subrange of the series
+        :param tuple ab: (a, b) bounds of the subrange
+        :return list [int p_ab, int q_ab, int t_ab, int iterations]
+        """
+        a, b = ab
+        self.iters = mpz(0)
+        self.start_time = time.time()
+        p_ab, q_ab, t_ab = self.__bs(mpz(a), mpz(b))
+        return [p_ab, q_ab, t_ab, int(self.iters)]
+
+    def bs_range_shared(self, ab):
+        """ Pool entry point, bs_range() with the big numbers handed back through shared memory """
+        return share(self.bs_range(ab))
+
+    def split_bs(self):
+        """ Cut [0, n) into subranges, split them (in a Pool if we have workers) and merge the results as a tree
+            With a checkpoint every finished subrange and every merged level is saved, and a resume starts from
+            the highest complete level on disk
+        :return list [None, int q, int t] for the whole series, p isn't needed at the top
+        """
+        n = int(self.n)
+        chunks = min(max(self.workers, CHECKPOINT_BLOCKS) if self.checkpoint else self.workers, n)
+        bounds = [n * i // chunks for i in range(chunks + 1)]
+        prefix = "chudnovsky-{}-{}-".format(self.ndigits, chunks)
+        sizes = [chunks]  # Number of subtrees at each level of the merge tree
+        while sizes[-1] > 2:
+            sizes.append((sizes[-1] + 1) // 2)
+        level, height = None, 0
+        if self.checkpoint:
+            for height in reversed(range(len(sizes))):
+                level = self.checkpoint.load_all(["{}bs{}-{}".format(prefix, height, j) for j in range(sizes[height])])
+                if level:
+                    logging.info("Chudnovsky resuming from {} checkpointed subtrees at level {}".format(len(level), height))
+                    break
+            else:
+                height = 0
+                if not self.checkpoint.resume:
+                    self.checkpoint.clear(prefix)
+        if self.workers > 1:
+            logging.debug("Starting %d Pool processes to binary split %d subranges.", self.workers, chunks)
+            mapper, bs_range, merge = get_pool(self.workers).imap, self.bs_range_shared, merge_pqt_shared
+        else:
+            mapper, bs_range, merge = map, self.bs_range, merge_pqt
+        if not level:
+            level = [self.checkpoint.load("{}bs0-{}".format(prefix, j)) if self.checkpoint else None for j in range(chunks)]
+            todo = [j for j in range(chunks) if level[j] is None]
+            if len(todo) < chunks:
+                logging.info("Chudnovsky resuming with {} of {} subranges checkpointed".format(chunks - len(todo), chunks))
+            iters = 0  # bs_range() restarts self.iters when it runs here instead of in a Pool
+            for j, result in zip(todo, mapper(bs_range, [(bounds[j], bounds[j+1]) for j in todo])):
+                iters += result[3]
+                level[j] = result[:3]
+                if self.checkpoint:
+                    level[j] = unshare(level[j])
+                    self.checkpoint.save("{}bs0-{}".format(prefix, j), level[j])
+            self.iters = mpz(iters)
+            level = [result[:3] for result in level]
+        while len(level) > 2:  # Each pass halves the list, pairs are merged side by side in the pool
+            merged = list(mapper(merge, zip(level[0::2], level[1::2])))
+            if len(level) % 2:
+                merged.append(level[-1])
+            level = merged
+            height += 1
+            if self.checkpoint:
+                level = [unshare(pqt) for pqt in level]
+                for j, pqt in enumerate(level):
+                    self.checkpoint.save("{}bs{}-{}".format(prefix, height, j), pqt)
+                self.checkpoint.clear("{}bs{}-".format(prefix, height - 1))
+            METRICS.progress('Chudnovsky', self.iters, 'merged down to {} subranges'.format(len(level)))
+        pqt = self.merge_top(level)
+        if self.checkpoint:
+            self.checkpoint.clear(prefix)
+        return pqt
+
+    def merge_top(self, level):
+        """ The last merge, the biggest products in the series.  With workers two of its three products go to the
+            Pool and the third is done here at the same time.
+        :param list level: one or two [p, q, t] from split_bs(), maybe shared
+        :return list [None, int q, int t] p isn't needed at the top
+        """
+        level = [unshare(pqt) for pqt in level]
+        if len(level) == 1:
+            return [None] + level[0][1:]
+        if self.workers < 2:
+            return merge_pqt(level, need_p=False)
+        (p_am, q_am, t_am), (p_mb, q_mb, t_mb) = level
+        del level, p_mb
+        products = get_pool(self.workers).imap(multiply_shared, [share([q_am, q_mb]), share([p_am, t_mb])])
+        del q_am, p_am, t_mb
+        t = q_mb * t_am
+        del q_mb, t_am
+        q, pt = (unshare(product)[0] for product in products)
+        t += pt
+        return [None, q, t]
+
+    def spill_range(self, task):
+        """ Pool entry point, binary split one subrange straight to the spill directory
+        :param tuple task: (a, b, key) bounds of the subrange and where it goes
+        :return int iterations
+        """
+        a, b, key = task
+        p_ab, q_ab, t_ab, iters = self.bs_range((a, b))
+        self.spill.save(key, [p_ab, q_ab, t_ab])
+        return iters
+
+    def spill_merge(self, task):
+        """ Pool entry point, merge two spilled subtrees into a third
+        :param tuple task: (left key, right key, merged key)
+        """
+        left, right, key = task
+        pqt = merge_pqt((self.spill.read(left), self.spill.read(right)))
+        self.spill.save(key, pqt)
+
+    def spill_bs(self):
+        """ Out of core split_bs(), every subtree goes to the spill directory as soon as it is finished and each merge
+            reads just its own pair, so memory only holds the merges in flight instead of the whole tree.
+            The files are the same as split_bs() checkpoints and a level that is all there is resumed from.
+        :return list [int q, int t] for the whole series, p isn't needed at the top
+        """
+        store = self.spill
+        n = int(self.n)
+        chunks = min(max(self.workers, CHECKPOINT_BLOCKS), n)
+        bounds = [n * i // chunks for i in range(chunks + 1)]
+        prefix = "chudnovsky-{}-{}-".format(self.ndigits, chunks)
+        sizes = [chunks]
+        while sizes[-1] > 2:
+            sizes.append((sizes[-1] + 1) // 2)
+        keys = [["{}bs{}-{}".format(prefix, height, j) for j in range(size)] for height, size in enumerate(sizes)]
+        if not store.resume:
+            store.clear(prefix)
+        height = next((height for height in reversed(range(len(sizes))) if all(map(store.exists, keys[height]))), 0)
+        mapper = get_pool(self.workers).imap_unordered if self.workers > 1 else map
+        if height:
+            logging.info("Chudnovsky resuming from {} spilled subtrees at level {}".format(sizes[height], height))
+        else:
+            todo = [(bounds[j], bounds[j+1], key) for j, key in enumerate(keys[0]) if not store.exists(key)]
+            logging.debug("Chudnovsky out of core, {} of {} subranges to split into {}".format(len(todo), chunks, store.directory))
+            self.iters = mpz(sum(mapper(self.spill_range, todo)))
+        while sizes[height] > 2:  # Each pass halves the level on disk
+            below, above = keys[height], keys[height + 1]
+            todo = [(below[2*j], below[2*j+1], above[j]) for j in range(sizes[height] // 2) if not store.exists(above[j])]
+            for __ in mapper(self.spill_merge, todo):
+                pass
+            if sizes[height] % 2:  # Carried up last so the level above is only complete when everything is in it
+                os.replace(store.path(below[-1]), store.path(above[-1]))
+            store.clear("{}bs{}-".format(prefix, height))
+            height += 1
+            METRICS.progress('Chudnovsky', self.iters, 'merged down to {} spilled subtrees'.format(sizes[height]))
+        p_am, q_am, t_am = store.read(keys[height][0])
+        if sizes[height] == 1:
+            q, t = q_am, t_am
+        else:
+            __, q_mb, t_mb = store.read(keys[height][1])
+            t = q_mb * t_am
+            del t_am
+            t += p_am * t_mb
+            del p_am, t_mb
+            q = q_am * q_mb
+        store.clear(prefix)
+        return q, t
+
+    def bs_leaf(self, a, b):
+        """ The leaf kernel, terms a to b-1 added left to right with plain ints instead of splitting down to one term.
+            Every term's q_k shares factors with the p built up so far, dividing the gcd out of both while the numbers
+            are still small keeps every product above them smaller.  p, q and t can all be scaled by the same factor
+            because only t/q and p/q matter to the merges.
+        :param int a: first term
+        :param int b: one past the last term
+        :return list [int p_ab, int q_ab, int t_ab]
+        """
+        A, B, C3_24 = self.LEAF_A, self.LEAF_B, self.LEAF_C3_24
+        if a == 0:
+            p, q, t = 1, 1, A
+            a = 1
+        else:
+            p, q, t = 1, 1, 0
+        for k in range(a, b):
+            p_k = (6 * k - 5) * (2 * k - 1) * (6 * k - 1)
+            q_k = k * k * k * C3_24
+            g = math.gcd(p, q_k)
+            if g > 1:
+                p //= g
+                q_k //= g
+            pp = p * p_k
+            t = t * q_k + (-pp if k & 1 else pp) * (A + B * k)
+            p = pp
+            q *= q_k
+        return [mpz(p), mpz(q), mpz(t)]
+
+    def __bs(self, a, b, need_p=True):
+        """ PQT computation by BSA(= Binary Splitting Algorithm)
+            Iterative, leaves of LEAF_TERMS terms are pushed on a stack and merged as soon as the one below
+            covers as many leaves, so the stack never holds more than log2 of the leaves
+        :param int a: positive integer
+        :param int b: positive integer
+        :param bool need_p: False at the top of the tree where p isn't used, the last merge skips it
+        :return list [int p_ab, int q_ab, int t_ab]
+        """
+        a, b = int(a), int(b)
+        stack = []  # [leaves, p, q, t] still waiting for their right hand neighbour
+        for lo in range(a, b, self.LEAF_TERMS):
+            hi = min(lo + self.LEAF_TERMS, b)
+            node = [1] + self.bs_leaf(lo, hi)
+            while stack and stack[-1][0] == node[0]:
+                left = stack.pop()
+                node = [left[0] + node[0]] + merge_pqt((left[1:], node[1:]))
+            stack.append(node)
+            iters = int(self.iters) + hi - lo
+            if iters // self.MMILL > self.iters // self.MMILL:
+                METRICS.progress('Chudnovsky', iters)
+            self.iters = mpz(iters)
+        pqt = stack.pop()[1:]
+        while stack:  # What is left is a few uneven subtrees, biggest at the bottom
+            pqt = merge_pqt((stack.pop()[1:], pqt), need_p or len(stack) > 0)
+        return pqt
+
+class PiConstant(PiEngine):
+    COST_FACTOR = 4.7e-9
+    MEMORY_FACTOR = 5
+    SQRT_SHARE = 0.6  # MPFR's const_pi() is an AGM too
+
+    def __init__(self,ndigits):
+        """ Initialization
+        :param int ndigits: digits of PI computation
+        """
+        self.ndigits = ndigits
+        self.iters = 1
+        self.start_time = 0
+
+    def compute_int(self):
+        """ Computation """
+        logging.debug("Starting GMPY2.const_pi() formula to {:,} decimal places"
+                .format(self.ndigits) )
+        precn = int((self.ndigits+2) * LOG2_10) 
+        self.start_time = time.time()
+        my_pi = mpfr_to_int(const_pi(precn),self.ndigits)
+        logging.debug('GMPY2.const_pi() calulation Done! {:,} iterations and {:.2f} seconds.'
+                .format(int(self.iters),time.time() - self.start_time))
+        return my_pi,self.iters,time.time()-self.start_time 
+
+class PiMPmath(PiEngine):
+    COST_FACTOR = 3.5e-9
+    MEMORY_FACTOR = 8
+
+    def __init__(self,ndigits):
+        """ Initialization
+        :param int ndigits: digits of PI computation
+        """
+        self.ndigits = ndigits
+        self.iters = 1
+        self.start_time = 0
+
+    def compute_int(self):
+        """ Computation """
+        import mpmath as m  # nothing else uses it, only pay for the import when this one runs
+        logging.debug("Starting MPmath.mp.pi() formula to {:,} decimal places"
+                .format(self.ndigits) )
+        m.mp.dps = int(self.ndigits+5)
+        self.start_time = time.time()
+        pi = m.mp.pi
+        my_pi =  mpz(int(m.floor(pi * pow(10,self.ndigits))))
+        logging.debug('MPmath.mp.pi() calulation Done! {:,} iterations and {:.2f} seconds.'
+                .format(int(self.iters),time.time() - self.start_time))
+        return my_pi,self.iters,time.time()-self.start_time 
+
+
+# Registry of formulae
+class Formula:
+    """ One entry in the list of formulae: who gets the credit, which engine class computes it and,
+        for the Machin-like ones, the arctan multipliers, denominators and signs
+    """
+    def __init__(self,key,name,engine,mults=None,denoms=None,opers=None,arctan="bs"):
+        """ Initialization
+        :param string key: short name for compute_pi(algorithm=...)
+        :param string name: credit, starts with a tab if it is already a full description
+        :param class engine: PiEngine subclass that does the work
+        :param list mults: Machin multipliers
+        :param list denoms: Machin arctan denominators
+        :param list opers: 1 or -1 to add or subtract each arctan
+        :param string arctan: how the Machin-like ones get their arctans, "bs" for binary splitting or "atan2"
+        """
+        self.key = key
+        self.name = name
+        self.engine = engine
+        self.mults = mults or []
+        self.denoms = denoms or []
+        self.opers = opers or []
+        self.arctan = arctan
+
+    @property
+    def short_name(self):
+        """ First line of the name without the tabs """
+        return self.name.strip().splitlines()[0].strip()
+
+    @property
+    def max_practical_digits(self):
+        return self.engine.MAX_PRACTICAL_DIGITS
+
+    def describe(self):
+        return say_formula(self.name,self.mults,self.denoms,self.opers)
+
+    def make(self,ndigits,workers=None,checkpoint=None,spill=None):
+        return self.engine.build(self,ndigits,workers,checkpoint,spill)
+
+    def estimated_cost(self,ndigits,workers=1):
+        return self.engine.estimated_cost(self,ndigits,workers)
+
+    def estimated_memory(self,ndigits,workers=1,out_of_core=False):
+        return self.engine.estimated_memory(self,ndigits,workers,out_of_core)
+
+#  Took values from lists from Machin and Miachin like formulae here:
+#  https://en.wikipedia.org/wiki/Machin-like_formula
+FORMULAE = [
+    Formula("machin", "John Machin 1706", PiMachin,
+        [4,1], [5,239], [1,-1]),
+    Formula("stormer", "F. C. M. Störmer 1896", PiMachin,
+        [44,7,12,24], [57,239,682,12943], [1,1,-1,1]),
+    Formula("takano", "Kikuo Takano 1982", PiMachin,
+        [12,32,5,12], [49,57,239,110443], [1,1,-1,1]),
+    Formula("hwang1997", "Hwang Chien-Lih, 1997", PiMachin,
+        [183,32,68,12,12,100], [239,1023,5832,110443,4841182,6826318], [1,1,-1,1,-1,-1]),
+    Formula("hwang2003", "Hwang Chien-Lih, 2003", PiMachin,
+        [183,32,68,12,100,12,12], [239,1023,5832,113021,6826318,33366019650,43599522992503626068], [1,1,-1,1,-1,-1,1]),
+    Formula("arndt", "Jörg Uwe Arndt 1993 ", PiMachin,
+        [36462,135908,274509,39581,178477,114569,146571,61914,69044,89431,43938],
+        [390112,485298,683982,1984933,2478328,3449051,18975991,22709274,24208144,201229582,2189376182],
+        [1,1,1,-1,1,-1,-1,1,-1,-1,-1]),
+    Formula("hwang2004", "Hwang Chien-Lih, 2004", PiMachin,
+        [36462,26522,19275,3119,3833,5183,37185,11010,3880,16507,7476],
+        [51387,485298,683982,1984933,2478328,3449051,18975991,22709274,24208144,201229582,2189376182],
+        [1,1,1,-1,-1,-1,-1,-1,1,-1,-1]),
+    Formula("bellard", "\tRadius Generator- Fabrice Bellard?, 1997 \n\tπ = 126N∑n=0(−1)n210n(−254n+1−14n+3+2810n+1−2610n+3−2210n+5−2210n+7+110n+9)\n", PiBellard),
+    Formula("agm", "\tThe Square AGM - Salamin & Brent, 1976\n\tπ = limit as n goes to infinity  (an+bn)**2/(4tn)\n", PiAGM),
+    Formula("chudnovsky", "\tChudnovsky brothers  1988 \n\tπ = (Q(0, N) / 12T(0, N) + 12AQ(0, N))**(C**(3/2))\n", PiChudnovsky),
+    Formula("const_pi", "\tconst_pi() function from the gmpy2 library", PiConstant),
+    Formula("mpmath", "\tmp.pi() function from the mpmath library", PiMPmath),
+    ]
+NUM_OF_FORMULAE = len(FORMULAE)
+FROM_RANGE = "[1 to {}]".format(NUM_OF_FORMULAE)
+
+def get_formula(algorithm):
+    """ get_formula finds a registry entry
+        :param algorithm: 1 based number as used by --algo, or a key like "chudnovsky"
+        :return Formula
+        :throws ValueError for anything not in FORMULAE
+        """
+    if isinstance(algorithm, int):
+        if 1 <= algorithm <= NUM_OF_FORMULAE:
+            return FORMULAE[algorithm - 1]
+    else:
+        for formula in FORMULAE:
+            if formula.key == algorithm:
+                return formula
+    raise ValueError("Unknown algorithm {!r}, use 1 to {} or one of {}"
+        .format(algorithm, NUM_OF_FORMULAE, ", ".join(f.key for f in FORMULAE)))
+
+def compute_pi(ndigits,algorithm="chudnovsky",workers=None,spill_dir=None):
+    """ compute_pi is the library entry point
+        :param int ndigits: digits after the decimal
+        :param algorithm: 1 based number as used by --algo, a key like "chudnovsky" or "auto" for choose_formula()
+        :param int workers: processes for the formulae that can use them
+        :param string spill_dir: run out of core keeping the subtrees here, as --out-of-core, needed past MAX_DIGITS
+        :return string: 3.1415... to ndigits
+        """
+    if not 1 <= ndigits <= (MAX_DIGITS_OUT_OF_CORE if spill_dir else MAX_DIGITS):
+        raise ValueError("ndigits must be 1 to {:,}{}".format(MAX_DIGITS_OUT_OF_CORE if spill_dir else MAX_DIGITS,
+            "" if spill_dir else ", or up to {:,} with spill_dir".format(MAX_DIGITS_OUT_OF_CORE)))
+    if algorithm == "auto":
+        formula, workers, __ = choose_formula(ndigits,workers)
+    else:
+        formula = get_formula(algorithm)
+    pi, __, __ = formula.make(ndigits,workers,spill=PiCheckpoint(spill_dir) if spill_dir else None).compute_int()
+    return pi_string(pi)
+
+# Benchmarking
+def physical_memory():
+    """ Bytes of RAM in the machine, None if the OS won't say """
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def plan_memory(formula,ndigits,workers=None,max_memory=None,out_of_core=False):
+    """ plan_memory fits a run into a memory budget using the formula's estimated_memory()
+        The workers asked for are kept if they fit, then fewer workers are tried, then the formula's
+        out of core mode if it has one.  Nothing that fits is a MemoryError before we start instead of a crash later.
+        :param Formula formula: the registry entry
+        :param int ndigits: digits after the decimal
+        :param int workers: processes asked for, None for the formula's default
+        :param int max_memory: budget in bytes, None for the machine's RAM
+        :param bool out_of_core: out of core was asked for, don't try in memory
+        :return tuple (workers, out_of_core, estimated bytes)
+        :throws MemoryError
+        """
+    max_memory = max_memory or physical_memory()
+    counts = [formula.engine.default_workers(workers)]
+    while counts[-1] > 1:  # halve down to one
+        counts.append(counts[-1] // 2)
+    smallest = None
+    for spill in ([True] if out_of_core else [False, True]):
+        for count in counts:
+            need = formula.estimated_memory(ndigits, count, spill)
+            if need is None:
+                break  # no out of core mode
+            if max_memory is None or need <= max_memory:
+                return count, spill, need
+            smallest = need if smallest is None else min(smallest, need)
+    if smallest is None:
+        raise MemoryError("{} has no out of core mode".format(formula.short_name))
+    raise MemoryError("π to {:,} digits with {} needs at least {:,} MB, the budget is {:,} MB"
+        .format(ndigits, formula.short_name, smallest // 2**20, max_memory // 2**20))
+
+def host_cache_path():
+    """ Where calibrate_host() keeps its results, under XDG_CACHE_HOME or ~/.cache """
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "pi-pourri", "host.json")
+
+def calibrate_host(refresh=False,path=None):
+    """ calibrate_host times this machine's mpz multiply and integer square root for --algo auto
+        Best of five at HOST_CALIBRATION_DIGITS, a fraction of a second.  The results are cached for the host,
+        core count and gmpy2 version so it only runs once
+        :param bool refresh: measure again even if the cache has it
+        :param string path: cache file, None for host_cache_path()
+        :return dict seconds for a mul and a sqrt, cores and memory bytes
+        """
+    import gmpy2, platform
+    path = path or host_cache_path()
+    cores = os.cpu_count() or 1
+    key = "{} {} cores gmpy2 {}".format(platform.node(), cores, gmpy2.version())
+    try:
+        with open(path, mode='rt', encoding="utf-8") as infile:
+            hosts = json.load(infile)
+    except (OSError, ValueError):
+        hosts = {}
+    if key in hosts and not refresh:
+        return hosts[key]
+    rng = random.Random(HOST_CALIBRATION_DIGITS)
+    bits = int(HOST_CALIBRATION_DIGITS * LOG2_10)
+    a, b = mpz(rng.getrandbits(bits)), mpz(rng.getrandbits(bits))
+    mul = root = float("inf")
+    for __ in range(5):
+        start = time.perf_counter()
+        product = a * b
+        mul = min(mul, time.perf_counter() - start)
+        start = time.perf_counter()
+        isqrt(product)
+        root = min(root, time.perf_counter() - start)
+    host = {"mul": round(mul, 6), "sqrt": round(root, 6), "cores": cores, "memory": physical_memory(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S")}
+    logging.debug("Calibrated {}: {:.4f} seconds a multiply and {:.4f} a square root at {:,} digits"
+        .format(key, mul, root, HOST_CALIBRATION_DIGITS))
+    hosts[key] = host
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", mode='wt', encoding="utf-8") as outfile:
+            json.dump(hosts, outfile, indent=1)
+        os.replace(path + ".tmp", path)
+    except OSError as e:
+        logging.debug("Couldn't cache the calibration in {}: {}".format(path, e))
+    return host
+
+def choose_formula(ndigits,workers=None,max_memory=None,host=None):
+    """ choose_formula is --algo auto, the quickest formula and worker count for ndigits that fits in memory
+        Each formula's estimated_cost() is scaled to this machine by its SQRT_SHARE of multiplies and square roots
+        against HOST_REFERENCE, plus WORKER_START_COST for each Pool process.  Formulae past their
+        MAX_PRACTICAL_DIGITS or without their library are left out.  Out of core is only picked when nothing fits.
+        :param int ndigits: digits after the decimal
+        :param int workers: processes asked for, None to pick the count too
+        :param int max_memory: budget in bytes, None for the machine's RAM
+        :param dict host: calibrate_host() results, None to calibrate (or read the cache)
+        :return tuple (Formula, workers, estimated seconds)
+        :throws MemoryError if nothing fits
+        """
+    host = host or calibrate_host()
+    max_memory = max_memory or physical_memory() or host.get("memory")
+    counts = [1]
+    while counts[-1] * 2 < host["cores"]:
+        counts.append(counts[-1] * 2)
+    if host["cores"] > 1:
+        counts.append(host["cores"])
+    candidates = []
+    for algox, formula in enumerate(FORMULAE):
+        engine = formula.engine
+        if engine.MAX_PRACTICAL_DIGITS and ndigits > engine.MAX_PRACTICAL_DIGITS:
+            continue
+        if engine is PiMPmath and importlib.util.find_spec("mpmath") is None:
+            continue
+        scale = ((1 - engine.SQRT_SHARE) * host["mul"] / HOST_REFERENCE["mul"]
+            + engine.SQRT_SHARE * host["sqrt"] / HOST_REFERENCE["sqrt"])
+        for count in (counts if engine.PARALLEL and not workers else [engine.default_workers(workers)]):
+            seconds = formula.estimated_cost(ndigits, count) * scale + (WORKER_START_COST * count if count > 1 else 0)
+            for spill in (False, True):
+                need = formula.estimated_memory(ndigits, count, spill)
+                if need is not None and (max_memory is None or need <= max_memory):
+                    candidates.append((spill, seconds, count, algox))
+                    break
+    if not candidates:
+        raise MemoryError("Nothing fits π to {:,} digits in {:,} MB".format(ndigits, max_memory // 2**20))
+    candidates.sort()
+    for spill, seconds, count, algox in candidates[:5]:
+        logging.debug("--algo auto: {} {} with {} workers{} about {:.3f} seconds"
+            .format(algox + 1, FORMULAE[algox].short_name, count, " out of core" if spill else "", seconds))
+    __, seconds, count, algox = candidates[0]
+    return FORMULAE[algox], count, seconds
+
+def pi_hex_digits(offset,count=100,workers=None):
+    """ pi_hex_digits is the digit extraction counterpart of compute_pi(), hex digits of π from an offset
+        without computing the ones before it
+        :param int offset: hex digits after the point to skip
+        :param int count: how many hex digits
+        :param int workers: Pool processes, default one per core
+        :return string: count hex digits
+        """
+    workers = workers or os.cpu_count() or 1
+    return "{:0{w}x}".format(bbp_hex_digits(offset, count, workers), w=count)
+
+def bench_run(algox,ndigits,workers,conn):
+    """ bench_run computes once in its own process so peak RSS belongs to this run only
+        :param int algox: zero based formula index
+        :param int ndigits: digits of PI computation
+        :param int workers: processes for the formulae that can use them
+        :param Connection conn: pipe to send the result dict back on
+        """
+    start_cpu = time.process_time()
+    start = time.time()
+    pi, iters, __ = FORMULAE[algox].make(ndigits,workers).compute_int()
+    wall = time.time() - start
+    close_pools()  # the Pool processes only show up in RUSAGE_CHILDREN once they have exited
+    mine = resource.getrusage(resource.RUSAGE_SELF)
+    kids = resource.getrusage(resource.RUSAGE_CHILDREN)  # Pool processes
+    end_digits = last_digits(pi,ndigits)
+    if ndigits not in LAST_5_DIGITS_OF_PI:
+        check = "unchecked"
+    else:
+        check = "ok" if LAST_5_DIGITS_OF_PI[ndigits] == end_digits else "WRONG"
+    conn.send({"wall_seconds": round(wall, 4),
+        "cpu_seconds": round(time.process_time() - start_cpu + kids.ru_utime + kids.ru_stime, 4),
+        "peak_rss_kb": max(mine.ru_maxrss, kids.ru_maxrss),
+        "iterations": int(iters),
+        "check": check})
+    conn.close()
+
+def bench_ladder(max_digits):
+    """ Powers of ten from 1,000 up to max_digits, plus max_digits itself """
+    ladder = []
+    size = 1000
+    while size < max_digits:
+        ladder.append(size)
+        size *= 10
+    return ladder + [max_digits]
+
+def run_benchmark(algos,max_digits,repeat,workers,out_name):
+    """ run_benchmark times each formula over a ladder of digit counts and writes a table
+        :param list algos: zero based formula indexes
+        :param int max_digits: top of the ladder
+        :param int repeat: runs of each formula and size
+        :param int workers: processes for the formulae that can use them
+        :param string out_name: .json writes JSON, anything else CSV
+        :return list of result dicts
+        """
+    rows = []
+    for ndigits in bench_ladder(max_digits):
+        for algox in algos:
+            limit = FORMULAE[algox].max_practical_digits
+            if limit and ndigits > limit:
+                logging.info("Skipping {} at {:,} digits, it is too slow past {:,}"
+                    .format(FORMULAE[algox].short_name,ndigits,limit))
+                continue
+            for run in range(repeat):
+                parent, child = multiprocessing.Pipe(duplex=False)
+                proc = multiprocessing.Process(target=bench_run, args=(algox,ndigits,workers,child))
+                proc.start()
+                child.close()
+                try:
+                    result = parent.recv()
+                except EOFError:  # died, probably out of memory
+                    result = {"wall_seconds": None, "cpu_seconds": None, "peak_rss_kb": None,
+                        "iterations": None, "check": "failed"}
+                proc.join()
+                row = {"algo": algox + 1, "formula": FORMULAE[algox].short_name, "digits": ndigits, "run": run + 1}
+                row.update(result)
+                rows.append(row)
+                logging.info("{:>2} {:<40} {:>13,} digits run {} {} seconds {} KB {}"
+                    .format(algox+1,FORMULAE[algox].short_name,ndigits,run+1,row["wall_seconds"],row["peak_rss_kb"],row["check"]))
+    write_bench_table(rows,out_name)
+    return rows
+
+def write_bench_table(rows,out_name):
+    """ write_bench_table writes benchmark rows, .json for JSON otherwise CSV """
+    with open(out_name, mode='wt', encoding="utf-8", newline='') as outfile:
+        if out_name.lower().endswith('.json'):
+            json.dump(rows, outfile, indent=1, ensure_ascii=False)
+        else:
+            import csv
+            writer = csv.DictWriter(outfile, fieldnames=list(rows[0].keys()) if rows else ["algo"])
+            writer.writeheader()
+            writer.writerows(rows)
+    logging.info("Wrote {} benchmark results to {}".format(len(rows), out_name))
+
+def run_startup_benchmark(repeat,out_name):
+    """ run_startup_benchmark times fresh interpreters, so import time for short runs can be tracked from release to release
+        Each case is run repeat times: the bare interpreter, importing the module, a 100 digit run and --help
+        :param int repeat: runs of each case
+        :param string out_name: .json writes JSON, anything else CSV
+        :return list of result dicts
+        """
+    import subprocess
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pi-pourri.py")  # the command line that imports us
+    load = "import sys; sys.path.insert(0, {!r}); import pipourri".format(os.path.dirname(script))
+    cases = [("interpreter", ["-c", "pass"]),
+        ("import", ["-c", load]),
+        ("-d 100 -a 10", [script, "-d", "100", "-a", "10", "-q", "-q"]),
+        ("--help", [script, "--help"])]
+    rows = []
+    for case, arguments in cases:
+        for run in range(repeat):
+            before = resource.getrusage(resource.RUSAGE_CHILDREN)
+            start = time.perf_counter()
+            subprocess.run([sys.executable] + arguments, stdout=subprocess.DEVNULL, check=True)
+            wall = time.perf_counter() - start
+            after = resource.getrusage(resource.RUSAGE_CHILDREN)
+            rows.append({"case": case, "run": run + 1, "wall_seconds": round(wall, 4),
+                "cpu_seconds": round(after.ru_utime + after.ru_stime - before.ru_utime - before.ru_stime, 4)})
+        best = min(row["wall_seconds"] for row in rows if row["case"] == case)
+        logging.info("{:<14} best of {} {:.4f} seconds".format(case, repeat, best))
+    write_bench_table(rows,out_name)
+    return rows
+
+# Server
+def serve_run(key,ndigits,workers,conn,spill_dir=None):
+    """ serve_run is one server job in its own process, like bench_run()
+        :param string key: formula key
+        :param int ndigits: digits of PI computation
+        :param int workers: processes for the formulae that can use them
+        :param Connection conn: pipe to send [pi] back on, a big one goes through shared memory
+        :param string spill_dir: out of core directory for jobs past MAX_DIGITS, each job spills to its own subdirectory
+        """
+    spill = None
+    if spill_dir and ndigits > MAX_DIGITS:
+        spill = PiCheckpoint(os.path.join(spill_dir, "{}-{}".format(key, ndigits)))
+    pi, __, __ = get_formula(key).make(ndigits,workers,spill=spill).compute_int()
+    conn.send(share([pi]))
+    conn.close()
+
+class PiJob:
+    """ One calculation the server is running, every request it covers waits on the same task """
+    def __init__(self,formula,ndigits):
+        self.formula = formula
+        self.ndigits = ndigits
+        self.clients = 0  # requests waiting, the job is cancelled when the last one goes away
+        self.process = None
+        self.task = None
+        self.cancelled = False  # new requests mustn't wait on it while it is being cancelled
+
+class PiServer:
+    """ Long running compute server, HTTP on a local port or a Unix socket
+        GET /pi?digits=N&algo=chudnovsky streams 3.1415... back with chunked encoding, converted a
+        DIGIT_CHUNK at a time and only as fast as the client reads it.  GET /jobs lists what is running.
+        A request waits on any running job of the same formula with at least as many digits and the largest
+        answer for each formula is kept, a smaller one is just a division by a power of ten.
+        Each job gets its own process (forked, so gmpy2 is already imported) with at most jobs of them at once,
+        and the process is killed when every request waiting on it has disconnected.
+    """
+    def __init__(self,workers=None,jobs=None,max_digits=MAX_DIGITS,spill_dir=None):
+        """ Initialization
+        :param int workers: processes each job may use, as -w
+        :param int jobs: jobs running at once, default one per core
+        :param int max_digits: biggest request accepted
+        :param string spill_dir: where jobs past MAX_DIGITS run out of core, as --out-of-core
+        """
+        self.workers = workers
+        self.jobs = jobs or os.cpu_count() or 1
+        self.max_digits = max_digits
+        self.spill_dir = spill_dir
+        self.slots = None  # asyncio.Semaphore, made in the server's loop
+        self.running = {}  # formula key -> list of PiJob
+        self.results = {}  # formula key -> (ndigits, pi * 10**ndigits) the largest so far
+
+    def serve(self,port=None,path=None,host="127.0.0.1"):
+        """ Run until killed, on a Unix socket if there is a path, otherwise on host:port """
+        import asyncio
+        resource_tracker.ensure_running()  # the job processes share it for the SharedValue segments
+        asyncio.run(self.main(port,path,host))
+
+    async def main(self,port,path,host):
+        import asyncio
+        self.slots = asyncio.Semaphore(self.jobs)
+        if path:
+            server = await asyncio.start_unix_server(self.handle, path=path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        logging.info("Serving π on {} with up to {} jobs at once".format(path or "http://{}:{}".format(host, port), self.jobs))
+        async with server:
+            await server.serve_forever()
+
+    def find(self,formula,ndigits):
+        """ A running job that covers ndigits, or a new one """
+        import asyncio
+        for job in self.running.get(formula.key, []):
+            if job.ndigits >= ndigits and not job.cancelled:
+                return job
+        job = PiJob(formula,ndigits)
+        self.running.setdefault(formula.key, []).append(job)
+        job.task = asyncio.get_running_loop().create_task(self.run(job))
+        return job
+
+    async def run(self,job):
+        """ Run a job in its own process once there is a slot for it
+        :return tuple (ndigits, pi * 10**ndigits)
+        """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        try:
+            async with self.slots:
+                logging.info("Job {} to {:,} digits started".format(job.formula.key, job.ndigits))
+                start = time.time()
+                parent, child = multiprocessing.Pipe(duplex=False)
+                job.process = multiprocessing.Process(target=serve_run, args=(job.formula.key,job.ndigits,self.workers,child,self.spill_dir))
+                job.process.start()
+                child.close()
+                ready = loop.create_future()  # the pipe has the answer, or end of file if the process died
+                loop.add_reader(parent.fileno(), lambda: ready.done() or ready.set_result(None))
+                try:
+                    await ready
+                    result = parent.recv()
+                except EOFError:  # killed, probably out of memory
+                    raise RuntimeError("{} to {:,} digits died".format(job.formula.short_name, job.ndigits))
+                except asyncio.CancelledError:
+                    job.process.terminate()
+                    raise
+                finally:
+                    loop.remove_reader(parent.fileno())
+                    await loop.run_in_executor(None, job.process.join)
+                    parent.close()
+                pi = unshare(result)[0]
+                logging.info("Job {} to {:,} digits done in {}".format(job.formula.key, job.ndigits,
+                    str(timedelta(seconds=time.time() - start))))
+        except asyncio.CancelledError:
+            logging.info("Job {} to {:,} digits cancelled, nobody is waiting for it".format(job.formula.key, job.ndigits))
+            raise
+        finally:
+            self.running[job.formula.key].remove(job)
+        best = self.results.get(job.formula.key)
+        if not best or best[0] < job.ndigits:
+            self.results[job.formula.key] = (job.ndigits, pi)
+        return job.ndigits, pi
+
+    async def compute(self,formula,ndigits,reader):
+        """ pi * 10**ndigits from the results, a running job or a new one
+        :param Formula formula: the registry entry
+        :param int ndigits: digits after the decimal
+        :param StreamReader reader: the request, if it hits end of file the client has gone
+        :return mpz or None if the client went away first
+        """
+        import asyncio
+        best = self.results.get(formula.key)
+        if not best or best[0] < ndigits:
+            job = self.find(formula,ndigits)
+            job.clients += 1
+            gone = asyncio.ensure_future(reader.read())  # returns when the client hangs up
+            try:
+                await asyncio.wait([gone, job.task], return_when=asyncio.FIRST_COMPLETED)
+            finally:
+                job.clients -= 1
+                gone.cancel()
+            if not job.task.done():
+                if not job.clients:
+                    job.cancelled = True
+                    job.task.cancel()
+                return None
+            best = job.task.result()
+        return best[1] // pow(mpz(10), best[0] - ndigits)
+
+    async def send_digits(self,writer,pi,ndigits):
+        """ Stream 3.1415... with chunked encoding, each chunk waits for the client to take the last one """
+        import asyncio
+        loop = asyncio.get_running_loop()
+        digit_stream = RadixConverter().convert(pi, ndigits + 1)
+        first = True
+        while True:
+            digits = await loop.run_in_executor(None, next, digit_stream, None)
+            if digits is None:
+                break
+            if first:
+                digits = digits[:1] + '.' + digits[1:]
+                first = False
+            data = digits.encode("ascii")
+            writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+            await writer.drain()  # backpressure, and ConnectionError if they have gone
+        writer.write(b"1\r\n\n\r\n0\r\n\r\n")
+
+    def respond(self,writer,status,body,content_type="text/plain; charset=utf-8"):
+        data = body.encode("utf-8")
+        writer.write("HTTP/1.1 {}\r\nContent-Type: {}\r\nContent-Length: {}\r\nConnection: close\r\n\r\n"
+            .format(status, content_type, len(data)).encode("ascii") + data)
+
+    def status(self):
+        return {"jobs": [{"algo": job.formula.key, "digits": job.ndigits, "clients": job.clients,
+                "started": job.process is not None} for jobs in self.running.values() for job in jobs],
+            "results": {key: digits for key, (digits, __) in self.results.items()}}
+
+    async def handle(self,reader,writer):
+        """ One HTTP request """
+        import urllib.parse
+        try:
+            request = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()).strip():  # headers, we don't need any
+                pass
+            if len(request) != 3 or request[0] != "GET":
+                self.respond(writer, "405 Method Not Allowed", "GET /pi?digits=N&algo=chudnovsky\n")
+                return
+            url = urllib.parse.urlsplit(request[1])
+            query = urllib.parse.parse_qs(url.query)
+            if url.path == "/jobs":
+                self.respond(writer, "200 OK", json.dumps(self.status()) + "\n", "application/json")
+                return
+            if url.path != "/pi":
+                self.respond(writer, "404 Not Found", "GET /pi?digits=N&algo=chudnovsky\n")
+                return
+            try:
+                ndigits = range_type(query.get("digits", ["100000"])[0], rngMin=1, rngMax=self.max_digits)
+                algo = query.get("algo", ["chudnovsky"])[0]
+                formula = get_formula(int(algo) if algo.isdigit() else algo)
+            except (argparse.ArgumentTypeError, ValueError) as e:
+                self.respond(writer, "400 Bad Request", "{}\n".format(e))
+                return
+            try:
+                pi = await self.compute(formula,ndigits,reader)
+            except RuntimeError as e:
+                self.respond(writer, "500 Internal Server Error", "{}\n".format(e))
+                return
+            if pi is None:
+                return
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; charset=ascii\r\n"
+                b"Transfer-Encoding: chunked\r\nConnection: close\r\n\r\n")
+            await self.send_digits(writer,pi,ndigits)
+        except ConnectionError:
+            logging.debug("Client went away")
+        finally:
+            writer.close()
+
+# Main for running one of the classes and saving the output
+def main():
+    """ main is the pi-pourri.py command line, it parses sys.argv and exits when it is done """
+
+    def describe_formulae():
+        """ The help description with every formula written out, only built when help is printed """
+        FORMULA_LIST = ""
+        for i, formula in enumerate(FORMULAE):
+            FORMULA_LIST += " {} {} \n".format(i+1,formula.describe())
+        return DESC_STRING.format(pgmName,FORMULA_LIST)
+
+    class PiArgumentParser(argparse.ArgumentParser):
+        def format_help(self):
+            self.description = describe_formulae()
+            return super().format_help()
+
+    pgmName =  os.path.basename(sys.argv[0])
+    DESC_STRING = """ {0} runs an algoritym from a list to calulate Pi to a number of decimal places
+      Default: {0} --digits 100000 --file pi.txt --alog 4
+
+      So -d 100,000,000 will take a while to finish, -d 1,000,000 very quickly
+      A last 5 digit validity check is done on powers of ten (10,...100,000,000)
+ eg.  {0} --file elbow.txt -d 1000000 -a 10
+      {0} -f test.txt -d 123,456
+
+      List of Formulae:
+
+{1} """
+
+    parser = PiArgumentParser(formatter_class=argparse.RawDescriptionHelpFormatter )
+    # add expected arguments
+    parser.add_argument('-f','--file', nargs='?', dest='filename', default='No File',
+                required=False,  help="File Name to write Pi to, - for stdout. Default is [%(default)s]")
+    parser.add_argument('--format', dest='digit_format', choices=DIGIT_FORMATS, default="text",
+                help="text is 3.1415..., bcd packs two digits a byte, u64 19 digits in 8 bytes, ycd is u64 in indexed blocks "
+                "with a y-cruncher like header. Default is [%(default)s]")
+    parser.add_argument('-d','--digits', nargs=1, dest='max_digits', metavar="[1 to 1,000,000,000]", default=[100000],
+                type=partial(range_type, rngMin=1, rngMax=MAX_DIGITS_OUT_OF_CORE), required=False,
+                help="How many digits to calculate, up to {:,} with --out-of-core.  Default is %(default)s ".format(MAX_DIGITS_OUT_OF_CORE))
+    parser.add_argument('-a','--algo',nargs=1, dest='algo', metavar=FROM_RANGE[:-1] + " or auto]", default=[4],
+                type=algo_type, required=False, help="Which Machin(like) formula, auto picks the quickest one (and -w) "
+                "that fits in memory for -d on this machine. Default is %(default)s")
+    parser.add_argument('--recalibrate', dest='recalibrate', action='store_true',
+                help="Time this machine's multiply and square root again for --algo auto instead of using the cached times, "
+                "with any other --algo the times are refreshed for the next auto run")
+    parser.add_argument('-w','--workers', nargs=1, dest='workers', metavar="[1 to 256]", default=None,
+                type=partial(range_type, rngMin=1, rngMax=256), required=False,
+                help="Worker processes for parallel binary splitting (Chudnovsky, Machin-like). Default is one, one per core for Machin")
+    parser.add_argument('--arctan', dest='arctan', choices=['bs','atan2'], default=None,
+                help="Machin-like arctans by integer binary splitting or gmpy2 atan2(). Default is the formula's choice [bs]")
+    parser.add_argument('--checkpoint', nargs='?', dest='checkpoint_dir', default=None, const='pi-checkpoint',
+                required=False, help="Save Chudnovsky and AGM progress to this directory. Default is [pi-checkpoint]")
+    parser.add_argument('--resume', dest='resume', action='store_true',
+                help="Restart Chudnovsky or AGM from the last good checkpoint (implies --checkpoint)")
+    parser.add_argument('--max-memory', nargs=1, dest='max_memory', metavar="[1 to 100,000,000 MB]", default=None,
+                type=partial(range_type, rngMin=1, rngMax=100000000), required=False,
+                help="Memory budget in MB, fewer workers or out of core are used to fit. Default is the machine's RAM")
+    parser.add_argument('--out-of-core', nargs='?', dest='spill_dir', default=None, const='pi-spill',
+                required=False, help="Chudnovsky keeps its subtrees on disk in this directory (or the --checkpoint one) "
+                "instead of in memory. Default is [pi-spill]")
+    parser.add_argument('--cache-dir', dest='cache_dir', default=None,
+                help="Keep the longest π computed so far here and serve smaller requests from it")
+    parser.add_argument('--cache-max', nargs=1, dest='cache_max', metavar="[1 to 100,000,000,000]", default=[MAX_DIGITS],
+                type=partial(range_type, rngMin=1, rngMax=MAX_DIGITS_OUT_OF_CORE), required=False,
+                help="Most digits kept in the --cache-dir, bigger answers are cut to this. Default is %(default)s")
+    parser.add_argument('--verify', dest='verify', action='store_true',
+                help="Check the answer with BBP hex digits at random positions, run alongside the calculation")
+    parser.add_argument('--verify-spots', nargs=1, dest='verify_spots', metavar="[1 to 64]", default=[4],
+                type=partial(range_type, rngMin=1, rngMax=64), required=False,
+                help="Random positions for --verify to check. Default is %(default)s")
+    parser.add_argument('--verify-algo', nargs=1, dest='verify_algo', metavar=FROM_RANGE, default=None,
+                type=partial(range_type, rngMin=1, rngMax=NUM_OF_FORMULAE), required=False,
+                help="Also run this formula and compare every digit (implies --verify)")
+    parser.add_argument('--batch', nargs='+', dest='batch', metavar="DIGITS", default=None,
+                help="Compute once to the biggest of these digit counts and write and check every one of them, "
+                "known is every count with known last 5 digits up to -d. Files are named from -f, pi.txt -> pi-1000.txt "
+                "or pi-{digits}.txt, default [" + BATCH_NAME + ".txt]")
+    parser.add_argument('--batch-file', dest='batch_file', metavar="MANIFEST", default=None,
+                help="Batch targets from a file, one a line: digits and optionally the file name to write")
+    parser.add_argument('--index', dest='index', action='store_true',
+                help="Build a k-gram index of the -f file (file.idx) after writing it, so --search is quick")
+    parser.add_argument('--search', nargs='+', dest='search', metavar="DIGITS", default=None,
+                help="Where each run of digits first turns up in the -f file and how many times, indexes the file first "
+                "if it isn't already.  Nothing is calculated")
+    parser.add_argument('--hex-offset', nargs=1, dest='hex_offset', metavar="[0 to 1,000,000,000]", default=None,
+                type=partial(range_type, rngMin=0, rngMax=1000000000), required=False,
+                help="Print --hex-count hex digits of π starting this many after the point, by BBP digit extraction")
+    parser.add_argument('--hex-count', nargs=1, dest='hex_count', metavar="[1 to 10,000]", default=[100],
+                type=partial(range_type, rngMin=1, rngMax=10000), required=False,
+                help="Hex digits for --hex-offset. Default is %(default)s")
+    parser.add_argument('--benchmark', dest='benchmark', action='store_true',
+                help="Time the formulae over 1,000 up to --bench-max digits and write a results table")
+    parser.add_argument('--bench-algos', dest='bench_algos', default=None, metavar="1,4,10",
+                help="Comma separated formulae to benchmark. Default is all of them")
+    parser.add_argument('--bench-max', nargs=1, dest='bench_max', metavar="[1,000 to 1,000,000,000]", default=[1000000],
+                type=partial(range_type, rngMin=1000, rngMax=1000000000), required=False,
+                help="Largest digit count to benchmark. Default is %(default)s")
+    parser.add_argument('--bench-repeat', nargs=1, dest='bench_repeat', metavar="[1 to 100]", default=[3],
+                type=partial(range_type, rngMin=1, rngMax=100), required=False,
+                help="Runs of each formula and size. Default is %(default)s")
+    parser.add_argument('--bench-startup', dest='bench_startup', action='store_true',
+                help="Time fresh interpreters: bare, importing this, a 100 digit run and --help, --bench-repeat times each")
+    parser.add_argument('--bench-out', dest='bench_out', default='bench.csv',
+                help="Benchmark results file, .json for JSON otherwise CSV. Default is [%(default)s]")
+    parser.add_argument('--serve', nargs='?', dest='serve_port', metavar="PORT", default=None, const=8314,
+                type=partial(range_type, rngMin=1, rngMax=65535), required=False,
+                help="Run as a server on localhost, GET /pi?digits=N&algo=chudnovsky streams π back. Default port is [%(const)s]")
+    parser.add_argument('--serve-socket', dest='serve_socket', metavar="PATH", default=None,
+                help="Run the server on this Unix socket instead of a port")
+    parser.add_argument('--serve-jobs', nargs=1, dest='serve_jobs', metavar="[1 to 256]", default=None,
+                type=partial(range_type, rngMin=1, rngMax=256), required=False,
+                help="Calculations the server runs at once. Default is one per core")
+    parser.add_argument('--metrics', dest='metrics_file', default=None,
+                help="Write per phase times, peak RSS and progress samples to this JSON file, - for stdout")
+    parser.add_argument('--profile', dest='profile_file', default=None,
+                help="cProfile the calculation into this file, read it with python -m pstats or snakeviz")
+    parser.add_argument('--trace-malloc', dest='trace_malloc', action='store_true',
+                help="Trace Python allocations during the calculation, the top sites go in --metrics")
+    parser.add_argument( "--verbose", "-v", dest="log_level", action="append_const",  const=-1,)
+    parser.add_argument( "--quiet", "-q", dest="log_level",action="append_const", const=1,)
+    args = parser.parse_args(sys.argv[1:])
+    if args.max_digits:
+        ndigits = int(args.max_digits[0])
+        if ndigits > MAX_DIGITS and not args.spill_dir:
+            parser.error("-d past {:,} needs --out-of-core".format(MAX_DIGITS))
+    if args.filename:
+        outFileName =  args.filename
+    auto = args.algo[0] == "auto"
+    if args.algo and not auto:
+        algox =  args.algo[0] - 1
+    workers = args.workers[0] if args.workers else None
+    checkpoint = None
+    if args.checkpoint_dir or args.resume:
+        checkpoint = PiCheckpoint(args.checkpoint_dir or 'pi-checkpoint', resume=args.resume)
+    log_level = LOG_LEVELS.index(DEFAULT_LOG_LEVEL)
+    if args.log_level:
+        for adjustment in args.log_level or ():
+            log_level = min(len(LOG_LEVELS) - 1, max(log_level + adjustment, 0))     
+    LOGLEVEL = LOG_LEVELS[log_level]
+    start_time = time.time()  # Start the clock for total time
+
+    formula = None if auto else FORMULAE[algox]  # pull the chosen formula from the list of formulae
+    if args.arctan:
+        for chosen in (FORMULAE if auto else [formula]):
+            chosen.arctan = args.arctan
+    if sys.stderr.isatty():
+        try:
+            # https://stackoverflow.com/questions/384076/how-can-i-color-python-logging-output
+            import Colorer
+        except ImportError:
+            pass
+    # Change logging to INFO or WARNING to see less output
+    logging.basicConfig(level=(LOGLEVEL),format='[%(levelname)s] %(asctime)s %(funcName)s: %(processName)s %(message)s')
+
+    if args.recalibrate and not auto:  # nothing to pick this run, the next --algo auto gets the new times
+        host = calibrate_host(True)
+        logging.info("Recalibrated this machine for --algo auto: {:.4f} seconds a multiply and {:.4f} a square root at {:,} digits"
+            .format(host["mul"],host["sqrt"],HOST_CALIBRATION_DIGITS))
+
+    if args.bench_startup:
+        run_startup_benchmark(args.bench_repeat[0],args.bench_out)
+        sys.exit(0)
+
+    if args.benchmark:
+        if args.bench_algos:
+            algos = [range_type(a, rngMin=1, rngMax=NUM_OF_FORMULAE) - 1 for a in args.bench_algos.split(',')]
+        else:
+            algos = list(range(NUM_OF_FORMULAE))
+        run_benchmark(algos,args.bench_max[0],args.bench_repeat[0],workers,args.bench_out)
+        sys.exit(0)
+
+    if args.serve_port or args.serve_socket:
+        PiServer(workers,args.serve_jobs[0] if args.serve_jobs else None,
+            MAX_DIGITS_OUT_OF_CORE if args.spill_dir else MAX_DIGITS,args.spill_dir).serve(args.serve_port,args.serve_socket)
+        sys.exit(0)
+
+    if args.hex_offset:
+        offset, count = args.hex_offset[0], args.hex_count[0]
+        start = time.time()
+        hex_digits = pi_hex_digits(offset,count,workers)
+        logging.info("Hex digits {:,} to {:,} of π took {}."
+            .format(offset+1,offset+count,str(timedelta(seconds=time.time() - start))))
+        if outFileName in ("-", "No File"):
+            print(hex_digits)
+        else:
+            with open(outFileName, mode='wt',encoding="utf-8") as outfile:
+                outfile.write(hex_digits + "\n")
+        sys.exit(0)
+
+    if args.search:
+        if outFileName in ("-", "No File"):
+            logging.error("--search needs the -f file to look in")
+            sys.exit(1)
+        try:
+            digit_file = DigitFile(outFileName)
+            try:
+                index = DigitIndex(outFileName + ".idx",digit_file)
+            except (OSError, ValueError) as e:
+                logging.info("Indexing {} first: {}".format(outFileName,e))
+                start = time.time()
+                index = DigitIndex.build(outFileName,workers=workers)
+                logging.info("Indexed {:,} digits in {}".format(len(digit_file),str(timedelta(seconds=time.time() - start))))
+            for pattern in args.search:
+                start = time.perf_counter()
+                first, count = index.first(pattern), index.count(pattern)
+                elapsed = (time.perf_counter() - start) * 1000
+                if first is None:
+                    print("{} isn't in the first {:,} digits of π ({:.1f} ms)".format(pattern,len(digit_file),elapsed))
+                else:
+                    print("{} first turns up at digit {:,} after the point and {:,} times in {:,} digits ({:.1f} ms)"
+                        .format(pattern,first + 1,count,len(digit_file),elapsed))
+        except (OSError, ValueError) as e:
+            logging.error("Can't search: {}".format(e))
+            sys.exit(1)
+        sys.exit(0)
+
+    targets = None
+    if args.batch or args.batch_file:
+        try:
+            targets = batch_targets(args.batch,args.batch_file,ndigits,MAX_DIGITS_OUT_OF_CORE if args.spill_dir else MAX_DIGITS)
+        except (ValueError, OSError, argparse.ArgumentTypeError) as e:
+            logging.error("Not starting the batch: {}".format(e))
+            sys.exit(1)
+        template = None if outFileName in ("-", "No File") else outFileName
+        targets = [(target, out_name or batch_file_name(template,target,args.digit_format)) for target, out_name in targets]
+        ndigits = targets[-1][0]
+        logging.info("Batch of {} targets from {:,} to {:,} digits".format(len(targets),targets[0][0],ndigits))
+
+    cache = DigitCache(args.cache_dir,args.cache_max[0]) if args.cache_dir else None
+    if cache and cache.has(ndigits) and not targets:
+        logging.info("Serving π to {:,} digits from the {:,} digits in {} (from {}, last 5 digits {})"
+            .format(ndigits,cache.index["digits"],cache.path,cache.index.get("formula"),cache.index.get("check")))
+        check = check_last_digits(cache.last_digits(ndigits),ndigits)
+        pi = None  # only read back from the text when something needs the number
+        if args.verify or args.verify_algo:  # the cache is only as good as the run that filled it
+            with METRICS.phase("verify"):
+                costed = formula or FORMULAE[parser.get_default("algo")[0] - 1]  # spots sized as if computing
+                verifier = PiVerifier(ndigits,args.verify_spots[0],
+                    costed.estimated_cost(ndigits,costed.engine.default_workers(workers)),costed.engine.default_workers(workers))
+                verifier.start()
+                pi = cache.value(ndigits)
+                check = verifier.verify(pi,check,args.verify_algo and get_formula(args.verify_algo[0]),workers)
+            if check == "WRONG":
+                logging.warning("The cached digits in {} failed verification".format(cache.path))
+        with METRICS.phase("output"):
+            if outFileName == "No File":
+                pass
+            elif args.digit_format != "text":  # the cache is text, pack it like a computed answer
+                converter = RadixConverter(workers=workers)
+                pi = cache.value(ndigits) if pi is None else pi
+                if outFileName == "-":
+                    time_to_convert, time_to_write = write_pi_packed(sys.stdout.buffer,pi,ndigits,args.digit_format,converter)
+                    sys.stdout.flush()
+                else:
+                    with open(outFileName, mode='wb') as outfile:
+                        time_to_convert, time_to_write = write_pi_packed(outfile,pi,ndigits,args.digit_format,converter)
+                    logging.debug('Wrote {:,} digits of π to {} file {} in {} seconds'
+                        .format(ndigits,args.digit_format,outFileName,str(timedelta(seconds=time_to_write))))
+                METRICS.add("convert", time_to_convert)
+                METRICS.add("write", time_to_write)
+            elif outFileName == "-":
+                METRICS.add("write", cache.write(sys.stdout,ndigits))
+                sys.stdout.write("\n")
+            else:
+                with open(outFileName, mode='wt',encoding="utf-8") as outfile:
+                    time_to_write = cache.write(outfile,ndigits)
+                METRICS.add("write", time_to_write)
+                logging.debug('Wrote {:,} digits of π to file {} in {} seconds'
+                    .format(ndigits,outFileName,str(timedelta(seconds=time_to_write))))
+        if args.index:
+            index_digits(outFileName,ndigits,workers)
+        if args.metrics_file:
+            METRICS.info.update({"formula": cache.index.get("formula"), "digits": ndigits, "cached": True, "check": check})
+            close_pools()  # the --verify workers
+            METRICS.write(args.metrics_file)
+        sys.exit(0)
+
+    if auto:
+        try:
+            formula, workers, seconds = choose_formula(ndigits,workers,
+                args.max_memory[0] * 2**20 if args.max_memory else None,calibrate_host(args.recalibrate))
+        except MemoryError as e:
+            logging.error("Not starting: {}".format(e))
+            sys.exit(1)
+        algox = FORMULAE.index(formula)
+        logging.info("--algo auto picked {} {} with {} workers, about {:.2f} seconds on this machine"
+            .format(algox + 1,formula.short_name,workers,seconds))
+
+    logging.info("Computing π to {:,} digits."
+            .format(ndigits))
+
+    METRICS.info.update({"formula": formula.short_name, "algo": algox + 1, "digits": ndigits})
+    with METRICS.phase("setup"):
+        try:
+            planned, out_of_core, need = plan_memory(formula,ndigits,workers,
+                args.max_memory[0] * 2**20 if args.max_memory else None,bool(args.spill_dir))
+        except MemoryError as e:
+            logging.error("Not starting: {}".format(e))
+            sys.exit(1)
+        if planned != formula.engine.default_workers(workers):
+            logging.warning("Using {} workers instead of {} to fit in memory".format(planned,formula.engine.default_workers(workers)))
+            workers = planned
+        spill = None
+        if out_of_core:
+            if not args.spill_dir:
+                logging.warning("Going out of core to fit in memory")
+            spill = checkpoint or PiCheckpoint(args.spill_dir or 'pi-spill', resume=args.resume)
+        logging.debug("Expecting a peak of about {:,} MB".format(need // 2**20))
+
+        verifier = None
+        if args.verify or args.verify_algo:
+            verifier = PiVerifier(ndigits,args.verify_spots[0],
+                formula.estimated_cost(ndigits,formula.engine.default_workers(workers)),formula.engine.default_workers(workers))
+            verifier.start()  # The spot checks run while we calculate
+
+        obj = formula.make(ndigits,workers,checkpoint,spill)
+    # Calculate Pi using selected formula
+    with METRICS.profile(args.profile_file,args.trace_malloc), METRICS.phase("compute"):
+        pi,iters,time_to_calc = obj.compute_int()
+
+    check = "unchecked"
+    if not targets:  # write_batch() checks every target
+        endDigits = last_digits(pi,ndigits)  # Pull the last 5 digits for a cross check
+        check = check_last_digits(endDigits,ndigits)
+    if verifier:
+        with METRICS.phase("verify"):
+            check = verifier.verify(pi,check,args.verify_algo and get_formula(args.verify_algo[0]),workers)
+    with METRICS.phase("output"):
+        time_to_convert = None
+        converter = RadixConverter(workers=workers)
+        if targets:
+            start = time.perf_counter()
+            batch = write_batch(pi,ndigits,targets,args.digit_format,workers)
+            for result in batch:
+                logging.info("{:>13,} digits {} {} in {:.3f} seconds (cut {:.3f}, convert {:.3f}, write {:.3f})"
+                    .format(result["digits"],result["check"],result["file"],result["seconds"],result["cut_seconds"],
+                        result.get("convert_seconds",0),result.get("write_seconds",0)))
+            logging.info("Batch of {} targets took {} after the calculation."
+                .format(len(batch),str(timedelta(seconds=time.perf_counter() - start))))
+            METRICS.info["targets"] = batch
+            batch_check = "WRONG" if any(result["check"] == "WRONG" for result in batch) else batch[-1]["check"]
+            if check != "WRONG" and batch_check != "unchecked":
+                check = batch_check
+        elif outFileName == "No File":
+            pass
+        elif args.digit_format != "text":  # packed digits after the point, DigitFile reads them
+            if outFileName == "-":
+                time_to_convert, time_to_write = write_pi_packed(sys.stdout.buffer,pi,ndigits,args.digit_format,converter)
+                sys.stdout.flush()
+            else:
+                with open(outFileName, mode='wb') as outfile:
+                    time_to_convert, time_to_write = write_pi_packed(outfile,pi,ndigits,args.digit_format,converter)
+                logging.debug('Wrote {:,} digits of π to {} file {} in {} seconds'
+                    .format(ndigits,args.digit_format,outFileName,str(timedelta(seconds=time_to_write))))
+        elif outFileName == "-":  # Stream to stdout
+            time_to_convert, time_to_write = write_pi(sys.stdout,pi,ndigits,converter)
+            sys.stdout.write("\n")
+            sys.stdout.flush()
+        else:  # File write? 
+            with open(outFileName, mode='wt',encoding="utf-8") as outfile:
+                time_to_convert, time_to_write = write_pi(outfile,pi,ndigits,converter)  # a chunk at a time, never the whole string
+            logging.debug('Wrote {:,} digits of π to file {} in {} seconds'
+            .format(ndigits,outFileName,str(timedelta(seconds=time_to_write))))
+        if cache:
+            text_file = outFileName if outFileName not in ("-", "No File") and args.digit_format == "text" else None
+            if targets:
+                text_file = targets[-1][1] if args.digit_format == "text" else None
+            cache.store(pi,ndigits,formula.short_name,check,text_file,converter)
+        if time_to_convert is not None:
+            METRICS.add("convert", time_to_convert)
+            METRICS.add("write", time_to_write)
+    if args.index:
+        index_digits(targets[-1][1] if targets else outFileName,ndigits,workers)
+   
+    logging.info("Calculated π to {:,} digits using a formula of:\n {} {} "
+        .format(ndigits,algox+1,formula.describe() ) )
+    logging.info("Calculation took {:,} iterations and {}."
+        .format(int(iters),str(timedelta(seconds=time_to_calc))) )
+    if time_to_convert is not None:
+        logging.info("Conversion to decimal took {}."
+            .format(str(timedelta(seconds=time_to_convert))) )
+    if args.metrics_file:
+        METRICS.info.update({"workers": workers or 1, "out_of_core": bool(spill), "iterations": int(iters), "check": check})
+        close_pools()  # so the Pool workers' peak RSS is in RUSAGE_CHILDREN
+        METRICS.write(args.metrics_file)
+    sys.exit(0)